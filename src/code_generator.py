@@ -1,23 +1,60 @@
 """
 Code Generator: Converts visual representations to executable Manim code.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import textwrap
+import hashlib
+import inspect
 import math
-from visual_mapper import VisualElement, VisualElementType
+import os
+import re
+import tempfile
+try:
+    import numpy as np
+except ImportError:
+    # Only needed for POINT_CLOUD elements, which require NumPy to exist
+    np = None
+from visual_mapper import VisualElement, VisualElementType, SYNTHETIC_POINTS, generate_correlated_points
+from timeline import TimelineScheduler, TimedAnimation, TimelineBatch
+
+
+# Point levels of detail, from full spheres down to flat dots; "auto" picks
+# one at render time from the point count and the output resolution
+POINT_LODS = ("auto", "sphere", "low_poly", "dot3d", "dot")
 
 
 class ManimeCodeGenerator:
     """Generates Manim code from visual scene descriptions."""
     
-    def __init__(self):
+    def __init__(self, persist_data: bool = False):
+        # Import line -> pattern of its use; None means always imported
         self.imports = [
-            "from manim import *",
-            "import numpy as np",
-            "from sklearn.decomposition import PCA",
-            "from sklearn.datasets import make_blobs"
+            ("from manim import *", None),
+            ("import functools", r"\bfunctools\."),
+            ("import os", r"\bos\."),
+            ("import tempfile", r"\btempfile\."),
+            ("import numpy as np", r"\bnp\."),
+            ("from pathlib import Path", r"\bPath\b"),
         ]
         
+        # Places absolute animation delays on a sequential play() timeline
+        self.scheduler = TimelineScheduler()
+        
+        # Planned vs. computed duration of each generated scene class
+        self.scene_timings: Dict[str, Dict[str, float]] = {}
+        
+        # Save the shared PCA data to a .npz sidecar next to the generated file
+        # so every render process loads it instead of refitting
+        self.persist_data = persist_data
+        
+        # .npz next to the generated file holding the displayed dataset sample
+        # and its PCA; set when visualizing a user dataset
+        self.data_file: Optional[str] = None
+        
+        # Coordinates of point clouds that are not the scene dataset, written
+        # next to the generated file as content-named .npy sidecars
+        self.point_files: Dict[str, "np.ndarray"] = {}
+        
         self.color_mapping = {
             "#3498db": "BLUE",
             "#e74c3c": "RED", 
@@ -42,40 +79,73 @@ class ManimeCodeGenerator:
         code += "        # Set up 3D scene\n"
         code += "        self.set_camera_orientation(phi=60 * DEGREES, theta=45 * DEGREES)\n\n"
         
-        # Generate data setup
-        code += self._generate_data_setup()
+        # Bind the shared data computed once at module level
+        code += "        # Shared PCA demonstration data\n"
+        code += "        self.data_3d, self.components, self.explained_variance = load_pca_data()\n\n"
+        
+        # Pick how data points are drawn before creating any of them
+        point_count = self._point_count_code(scene_data["elements"])
+        if point_count:
+            code += self._generate_point_lod_code(scene_data.get("point_lod", "auto"), point_count)
+        
+        # Runs of data points are emitted as one vectorized point cloud
+        clouds = self._find_point_clouds(scene_data["elements"])
+        cloud_starts = {id(members[0]): (name, members) for name, members in clouds}
+        cloud_members = {id(element) for _, members in clouds for element in members}
         
         # Generate visual elements
         for element in scene_data["elements"]:
-            code += self._generate_element_code(element)
+            if id(element) in cloud_starts:
+                code += self._generate_point_cloud_code(*cloud_starts[id(element)])
+            elif id(element) not in cloud_members:
+                code += self._generate_element_code(element)
         
         # Generate animations
-        code += self._generate_animation_sequence(scene_data["elements"])
+        animation_code, animation_time = self._generate_animation_sequence(scene_data["elements"], clouds)
+        code += animation_code
         
         # Generate camera movements
+        camera_time = 0.0
         if scene_data.get("camera_movements"):
             code += self._generate_camera_movements(scene_data["camera_movements"])
-        
-        # Add narration timing
-        code += f"\n        # Hold for narration\n"
-        code += f"        self.wait({scene_data['duration']})\n"
+            camera_time = sum(movement.duration for movement in scene_data["camera_movements"])
+        
+        # Hold for whatever the planned duration has left
+        hold = max(scene_data["duration"] - animation_time - camera_time, 0.0)
+        if hold > 0:
+            code += f"\n        # Hold for narration\n"
+            code += f"        self.wait({hold:.4g})\n"
+        
+        self.scene_timings[class_name] = {
+            "planned": scene_data["duration"],
+            "animations": animation_time,
+            "camera": camera_time,
+            "total": animation_time + camera_time + hold,
+        }
         
         return code
     
-    def generate_complete_file(self, visual_scenes: List[Dict[str, Any]], output_path: str = None) -> str:
-        """Generate a complete Manim file with all scenes."""
-        code = "#!/usr/bin/env python3\n"
-        code += '"""\nPCA Visualization - Generated Manim Animation\n"""\n\n'
-        
-        # Add imports
-        for import_line in self.imports:
-            code += import_line + "\n"
-        code += "\n\n"
-        
+    def generate_complete_file(self, 
+                               visual_scenes: List[Dict[str, Any]], 
+                               output_path: str = None,
+                               scene_codes: Optional[List[str]] = None) -> str:
+        """Generate a complete Manim file with all scenes.
+        
+        ``scene_codes`` may supply previously generated class text for each
+        scene, in which case those scenes are not re-emitted.
+        """
         # Generate each scene class
-        for scene_data in visual_scenes:
-            code += self.generate_scene_class(scene_data)
-            code += "\n\n"
+        body = ""
+        for i, scene_data in enumerate(visual_scenes):
+            if scene_codes is not None and scene_codes[i]:
+                body += scene_codes[i]
+            else:
+                body += self.generate_scene_class(scene_data)
+            body += "\n\n"
+        
+        # The header imports only what the scenes actually use
+        code = self.generate_header(body)
+        code += body
         
         # Generate main execution
         code += self._generate_main_execution(visual_scenes)
@@ -83,33 +153,169 @@ class ManimeCodeGenerator:
         if output_path:
             with open(output_path, 'w') as f:
                 f.write(code)
+            self._write_point_files(os.path.dirname(os.path.abspath(output_path)), body)
         
         return code
     
+    def _write_point_files(self, directory: str, body: str) -> None:
+        """Save the point-cloud sidecars the scene ``body`` loads, atomically and once."""
+        for file_name, positions in self.point_files.items():
+            path = os.path.join(directory, file_name)
+            if file_name in body and not os.path.exists(path):
+                fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".npy")
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, positions)
+                os.replace(tmp_name, path)
+    
+    def generate_header(self, body: str = "") -> str:
+        """Generate the module header shared by every scene class.
+        
+        Imports are emitted only when the helpers or the scene ``body`` use them.
+        """
+        # Module-level PCA helper and data provider shared by every scene class;
+        # the synthetic sample comes from the mapper's own generator
+        helpers = "" if self.data_file else (self._generate_pca_helper() + "\n\n"
+                                             + inspect.getsource(generate_correlated_points) + "\n\n")
+        helpers += self._generate_data_setup() + "\n\n"
+        if re.search(r"\bmake_point\(", body):
+            helpers += self._generate_point_helpers() + "\n\n"
+        
+        code = "#!/usr/bin/env python3\n"
+        code += '"""\nPCA Visualization - Generated Manim Animation\n"""\n\n'
+        
+        # Add imports
+        for import_line, pattern in self.imports:
+            if pattern is None or re.search(pattern, helpers + body):
+                code += import_line + "\n"
+        code += "\n\n"
+        
+        code += helpers
+        return code
+    
     def _to_class_name(self, scene_name: str) -> str:
         """Convert scene name to valid class name."""
         return ''.join(word.capitalize() for word in scene_name.split('_'))
     
+    def _generate_pca_helper(self) -> str:
+        """Generate a NumPy PCA helper so generated files need no scikit-learn."""
+        return textwrap.dedent('''
+            def fit_pca(data):
+                """Return the principal axes (rows) and their explained variance."""
+                centered = data - data.mean(axis=0)
+                _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+                
+                # Fix each axis' sign so its largest coordinate is positive
+                largest = np.argmax(np.abs(components), axis=1)
+                components *= np.sign(components[np.arange(len(components)), largest])[:, None]
+                
+                explained_variance = singular_values ** 2 / (len(data) - 1)
+                return components, explained_variance
+        ''').lstrip("\n")
+    
+    def _generate_point_helpers(self) -> str:
+        """Generate the point level-of-detail helpers."""
+        return textwrap.dedent('''
+            def choose_point_lod(count):
+                """Pick a point LOD from the point count and the render resolution."""
+                if config.pixel_height >= 1080:
+                    # Final renders keep full spheres unless the cloud is dense
+                    if count <= 200:
+                        return "sphere"
+                    return "low_poly" if count <= 2000 else "dot3d"
+                if config.pixel_height >= 720:
+                    return "low_poly" if count <= 500 else "dot3d"
+                # Draft renders favour speed
+                return "dot3d" if count <= 100 else "dot"
+            
+            
+            def make_point(coord, radius, lod):
+                """Build one data point at the given level of detail."""
+                if lod == "sphere":
+                    return Sphere(radius=radius).move_to(coord)
+                if lod == "low_poly":
+                    return Sphere(radius=radius, resolution=(12, 6)).move_to(coord)
+                if lod == "dot3d":
+                    return Dot3D(point=coord, radius=radius, resolution=(6, 4))
+                return Dot(point=coord, radius=radius)
+        ''').lstrip("\n")
+    
+    def _point_count_code(self, elements: List[VisualElement]) -> str:
+        """Expression for the number of data points a scene draws, or "" if none."""
+        individual = 0
+        parts = []
+        for element in elements:
+            if element.element_type == VisualElementType.POINT_CLOUD:
+                individual += len(element.properties["positions"])
+                continue
+            if element.element_type != VisualElementType.POINT:
+                continue
+            if "data_point" in element.element_id:
+                individual += 1
+            else:
+                parts.append("len(self.data_3d)")
+        if individual:
+            parts.insert(0, str(individual))
+        return " + ".join(parts)
+    
+    def _generate_point_lod_code(self, point_lod: str, point_count: str) -> str:
+        """Generate the line that fixes the scene's point level of detail."""
+        if point_lod not in POINT_LODS:
+            raise ValueError(f"Unknown point_lod: {point_lod}")
+        
+        code = "        # Point level of detail\n"
+        if point_lod == "auto":
+            code += f"        lod = choose_point_lod({point_count})\n"
+        else:
+            code += f'        lod = "{point_lod}"\n'
+        return code
+    
     def _generate_data_setup(self) -> str:
-        """Generate data setup code."""
-        code = textwrap.dedent("""
-        # Generate sample data for PCA demonstration
-        rng = np.random.RandomState(42)
-        n_samples = 50
-        
-        # Create correlated 3D data
-        mean = [0, 0, 0]
-        cov = [[2, 1.5, 0.5], [1.5, 1, 0.3], [0.5, 0.3, 0.5]]
-        self.data_3d = rng.multivariate_normal(mean, cov, n_samples)
-        
-        # Perform PCA
-        self.pca = PCA(n_components=3)
-        self.pca.fit(self.data_3d)
-        self.components = self.pca.components_
-        self.explained_variance = self.pca.explained_variance_
-        
-        """)
-        return textwrap.indent(code, "        ")
+        """Generate the module-level, memoized data and PCA provider."""
+        if self.data_file:
+            code = "@functools.lru_cache(maxsize=None)\n"
+            code += "def load_pca_data():\n"
+            code += '    """Load the displayed dataset sample and its PCA, shared by all scenes."""\n'
+            code += f'    with np.load(Path(__file__).with_name("{self.data_file}")) as saved:\n'
+            code += '        return saved["data_3d"], saved["components"], saved["explained_variance"]\n'
+            return code
+        
+        compute = textwrap.dedent(f"""
+            # The synthetic sample the visual mapper fitted the scene geometry to
+            data_3d = generate_correlated_points({SYNTHETIC_POINTS})
+            
+            # Perform PCA
+            components, explained_variance = fit_pca(data_3d)
+        """).lstrip("\n")
+        
+        code = "@functools.lru_cache(maxsize=None)\n"
+        code += "def load_pca_data():\n"
+        code += '    """Compute the data and PCA shared by all scenes once per process."""\n'
+        
+        if self.persist_data:
+            # Name the sidecar after the computation so a changed setup never
+            # loads stale arrays
+            digest = hashlib.sha1(compute.encode()).hexdigest()[:12]
+            code += f'    sidecar = Path(__file__).with_name(Path(__file__).stem + "_data_{digest}.npz")\n'
+            code += "    if sidecar.exists():\n"
+            code += "        with np.load(sidecar) as saved:\n"
+            code += '            return saved["data_3d"], saved["components"], saved["explained_variance"]\n'
+            code += "\n"
+        
+        code += textwrap.indent(compute, "    ")
+        
+        if self.persist_data:
+            code += textwrap.indent(textwrap.dedent("""
+                # Write atomically: other render processes may be loading it
+                fd, tmp_name = tempfile.mkstemp(dir=sidecar.parent, suffix=".npz")
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, data_3d=data_3d, components=components,
+                             explained_variance=explained_variance)
+                os.replace(tmp_name, sidecar)
+            """), "    ")
+        
+        code += "\n"
+        code += "    return data_3d, components, explained_variance\n"
+        return code
     
     def _generate_element_code(self, element: VisualElement) -> str:
         """Generate code for a visual element."""
@@ -117,6 +323,8 @@ class ManimeCodeGenerator:
         
         if element.element_type == VisualElementType.POINT:
             code += self._generate_points_code(element)
+        elif element.element_type == VisualElementType.POINT_CLOUD:
+            code += self._generate_point_cloud_element_code(element)
         elif element.element_type == VisualElementType.ARROW:
             code += self._generate_arrow_code(element)
         elif element.element_type == VisualElementType.SURFACE:
@@ -140,7 +348,7 @@ class ManimeCodeGenerator:
             
             code = f"""
         # Data point {element.element_id}
-        {element.element_id} = Sphere(radius={size}).move_to([{x:.2f}, {y:.2f}, {z:.2f}])
+        {element.element_id} = make_point([{x:.2f}, {y:.2f}, {z:.2f}], {size}, lod)
         {element.element_id}.set_color({color})
         {element.element_id}.set_opacity({element.properties.get("opacity", 1.0)})
         
@@ -154,27 +362,136 @@ class ManimeCodeGenerator:
         # Create data points
         self.data_points = VGroup()
         for i, point in enumerate(self.data_3d):
-            sphere = Sphere(radius={size}).move_to([point[0], point[1], point[2]])
-            sphere.set_color({color})
-            sphere.set_opacity({element.properties.get("opacity", 0.8)})
-            self.data_points.add(sphere)
+            dot = make_point([point[0], point[1], point[2]], {size}, lod)
+            dot.set_color({color})
+            dot.set_opacity({element.properties.get("opacity", 0.8)})
+            self.data_points.add(dot)
         
 """
         
         return code
     
+    def _find_point_clouds(self, elements: List[VisualElement]) -> List[Tuple[str, List[VisualElement]]]:
+        """Find runs of consecutive data points to emit as point clouds."""
+        clouds = []
+        run = []
+        for element in elements + [None]:
+            if (element is not None
+                    and element.element_type == VisualElementType.POINT
+                    and element.element_id.startswith("data_point_")):
+                run.append(element)
+                continue
+            if len(run) >= 2:
+                name = "point_cloud" if not clouds else f"point_cloud_{len(clouds) + 1}"
+                clouds.append((name, run))
+            run = []
+        return clouds
+    
+    def _generate_point_cloud_code(self, name: str, points: List[VisualElement]) -> str:
+        """Generate code for many data points as one coordinate array and group."""
+        colors = [self._get_manim_color(p.properties.get("color", "#95a5a6")) for p in points]
+        sizes = [p.properties.get("size", 0.1) for p in points]
+        opacities = [p.properties.get("opacity", 1.0) for p in points]
+        
+        code = f"\n        # Data points {points[0].element_id}..{points[-1].element_id} as one point cloud\n"
+        suffixes = [p.element_id[len("data_point_"):] for p in points]
+        if all(suffix.isdigit() for suffix in suffixes):
+            # data_point_<i> is row i of the shared dataset from load_pca_data()
+            indices = [int(suffix) for suffix in suffixes]
+            if indices == list(range(indices[0], indices[0] + len(indices))):
+                code += f"        {name}_coords = self.data_3d[{indices[0]}:{indices[-1] + 1}]\n"
+            else:
+                code += f"        {name}_coords = self.data_3d[{indices}]\n"
+        else:
+            code += f"        {name}_coords = {self._point_file_code(np.array([p.position for p in points]))}\n"
+        
+        if len(set(sizes)) == 1:
+            code += f"        {name} = VGroup(*[\n"
+            code += f"            make_point(coord, {sizes[0]}, lod) for coord in {name}_coords\n"
+            code += "        ])\n"
+        else:
+            code += f"        {name}_radii = np.array({[round(size, 4) for size in sizes]})\n"
+            code += f"        {name} = VGroup(*[\n"
+            code += f"            make_point(coord, radius, lod)\n"
+            code += f"            for coord, radius in zip({name}_coords, {name}_radii)\n"
+            code += "        ])\n"
+        
+        if len(set(colors)) == 1:
+            code += f"        {name}.set_color({colors[0]})\n"
+        else:
+            code += f"        for point, color in zip({name}, [{', '.join(colors)}]):\n"
+            code += "            point.set_color(color)\n"
+        
+        if len(set(opacities)) == 1:
+            code += f"        {name}.set_opacity({opacities[0]})\n"
+        else:
+            code += f"        for point, opacity in zip({name}, {opacities}):\n"
+            code += "            point.set_opacity(opacity)\n"
+        
+        code += "        \n"
+        return code
+    
+    def _generate_point_cloud_element_code(self, element: VisualElement) -> str:
+        """Generate code for an array-backed POINT_CLOUD element."""
+        name = element.element_id
+        positions = element.properties["positions"]
+        colors = element.properties["colors"]
+        sizes = element.properties["sizes"]
+        
+        code = f"\n        # {name}: {len(positions)} points as one point cloud\n"
+        if element.properties.get("shared_dataset"):
+            # The points are the scene dataset that load_pca_data() provides
+            code += f"        {name}_coords = self.data_3d\n"
+        else:
+            # Per-point arrays never go into the code, so its size does not grow with N
+            code += f"        {name}_coords = {self._point_file_code(positions)}\n"
+        
+        if np.all(sizes == sizes[0]):
+            code += f"        {name} = VGroup(*[\n"
+            code += f"            make_point(coord, {float(sizes[0]):.4g}, lod) for coord in {name}_coords\n"
+            code += "        ])\n"
+        else:
+            code += f"        {name}_radii = {self._point_file_code(sizes)}\n"
+            code += f"        {name} = VGroup(*[\n"
+            code += f"            make_point(coord, radius, lod)\n"
+            code += f"            for coord, radius in zip({name}_coords, {name}_radii)\n"
+            code += "        ])\n"
+        
+        if np.all(colors == colors[0]):
+            code += f"        {name}.set_color({self._get_manim_color(self._rgb_to_hex(colors[0]))})\n"
+        else:
+            code += f"        {name}_colors = {self._point_file_code(colors)}\n"
+            code += f"        for point, rgb in zip({name}, {name}_colors):\n"
+            code += "            point.set_color(rgb_to_color(rgb))\n"
+        
+        code += f"        {name}.set_opacity({element.properties.get('opacity', 1.0)})\n"
+        code += "        \n"
+        return code
+    
+    def _point_file_code(self, array: "np.ndarray") -> str:
+        """Expression loading a per-point array from its content-named .npy sidecar."""
+        array = np.ascontiguousarray(array, dtype=float)
+        file_name = f"points_{hashlib.sha1(repr(array.shape).encode() + array.tobytes()).hexdigest()[:12]}.npy"
+        self.point_files[file_name] = array
+        return f'np.load(Path(__file__).with_name("{file_name}"))'
+    
+    def _rgb_to_hex(self, rgb: "np.ndarray") -> str:
+        return "#" + "".join(f"{int(round(float(c) * 255)):02x}" for c in rgb)
+    
     def _generate_arrow_code(self, element: VisualElement) -> str:
         """Generate code for arrows (principal components)."""
         color = self._get_manim_color(element.properties.get("color", "#3498db"))
         direction = element.properties.get("direction", (1, 0, 0))
         length = element.properties.get("length", 2.0)
         thickness = element.properties.get("thickness", 0.05)
+        start = element.position
+        end = [start[i] + direction[i] * length for i in range(3)]
         
         code = f"""
         # {element.element_id}
         {element.element_id} = Arrow3D(
-            start=ORIGIN,
-            end=[{direction[0] * length:.2f}, {direction[1] * length:.2f}, {direction[2] * length:.2f}],
+            start=[{start[0]:.2f}, {start[1]:.2f}, {start[2]:.2f}],
+            end=[{end[0]:.2f}, {end[1]:.2f}, {end[2]:.2f}],
             color={color},
             thickness={thickness}
         )
@@ -192,10 +509,12 @@ class ManimeCodeGenerator:
         
         code = f"""
         # {element.element_id}
-        {element.element_id} = Rectangle(width={width}, height={height})
+        {element.element_id} = Rectangle(width={width:.3g}, height={height:.3g})
         {element.element_id}.set_fill({color}, opacity={opacity})
         {element.element_id}.set_stroke({color}, width=2)
-        {element.element_id}.move_to([{element.position[0]}, {element.position[1]}, {element.position[2]}])
+"""
+        code += self._generate_orientation_code(element)
+        code += f"""        {element.element_id}.move_to([{element.position[0]:.3g}, {element.position[1]:.3g}, {element.position[2]:.3g}])
         
 """
         
@@ -210,15 +529,33 @@ class ManimeCodeGenerator:
         
         code = f"""
         # {element.element_id}
-        {element.element_id} = Ellipse(width={width}, height={height})
+        {element.element_id} = Ellipse(width={width:.3g}, height={height:.3g})
         {element.element_id}.set_fill({color}, opacity={opacity})
         {element.element_id}.set_stroke({color}, width=2)
         {element.element_id}.rotate({element.properties.get("rotation", 0)} * DEGREES)
-        
 """
+        if "orientation" in element.properties:
+            code += self._generate_orientation_code(element)
+            code += f"        {element.element_id}.move_to([{element.position[0]:.3g}, {element.position[1]:.3g}, {element.position[2]:.3g}])\n"
+        code += "        \n"
         
         return code
     
+    def _generate_orientation_code(self, element: VisualElement) -> str:
+        """Lay a flat (xy-plane) mobject into the plane of an orientation basis.
+        
+        ``orientation`` holds three basis rows; x maps onto the first and y
+        onto the second.
+        """
+        orientation = element.properties.get("orientation")
+        if not orientation:
+            return ""
+        
+        # apply_matrix maps p -> M p, so the basis rows become M's columns
+        matrix = [[row[i] for row in orientation] for i in range(3)]
+        rows = ", ".join("[" + ", ".join(f"{v:.4f}" for v in row) + "]" for row in matrix)
+        return f"        {element.element_id}.apply_matrix([{rows}])\n"
+    
     def _generate_line_code(self, element: VisualElement) -> str:
         """Generate code for lines (projection lines)."""
         color = self._get_manim_color(element.properties.get("color", "#95a5a6"))
@@ -257,55 +594,160 @@ class ManimeCodeGenerator:
         
         return code
     
-    def _generate_animation_sequence(self, elements: List[VisualElement]) -> str:
-        """Generate animation sequence for all elements."""
+    def _generate_animation_sequence(self, 
+                                     elements: List[VisualElement], 
+                                     clouds: Optional[List[Tuple[str, List[VisualElement]]]] = None) -> Tuple[str, float]:
+        """Generate animation sequence for all elements.
+        
+        Returns the code and the scene time the animations take.
+        """
         code = """
         # Animation sequence
         animations = []
         
 """
         
-        # Group animations by timing
-        animation_groups = {}
+        # Point cloud members are referenced through their group
+        refs = {id(element): element.element_id for element in elements}
+        timed = []
+        for name, members in clouds or []:
+            stagger = self._uniform_stagger(members)
+            if stagger is not None:
+                timed.append(self._lagged_animation(name, members[0].animation_sequence[0],
+                                                    stagger, len(members)))
+                refs.update({id(element): None for element in members})
+            else:
+                refs.update({id(element): f"{name}[{i}]" for i, element in enumerate(members)})
         
         for element in elements:
+            if refs[id(element)] is None:
+                continue
             for animation in element.animation_sequence:
-                delay = animation.get("delay", 0)
-                if delay not in animation_groups:
-                    animation_groups[delay] = []
-                animation_groups[delay].append((element.element_id, animation))
-        
-        # Generate animations in order
-        for delay in sorted(animation_groups.keys()):
-            if delay > 0:
-                code += f"        self.wait({delay})\n"
-            
-            animations = animation_groups[delay]
-            anim_code = "        self.play(\n"
-            
-            for element_id, animation in animations:
-                anim_type = animation.get("type", "fade_in")
+                if element.element_type == VisualElementType.POINT_CLOUD and animation.get("stagger"):
+                    timed.append(self._lagged_animation(element.element_id, animation, animation["stagger"],
+                                                        len(element.properties["positions"])))
+                    continue
                 duration = animation.get("duration", 1.0)
-                
-                if anim_type == "fade_in":
-                    anim_code += f"            FadeIn({element_id}),\n"
-                elif anim_type == "grow_arrow":
-                    anim_code += f"            GrowArrow({element_id}),\n"
-                elif anim_type == "scale":
-                    scale_to = animation.get("to", 1.2)
-                    anim_code += f"            {element_id}.animate.scale({scale_to}),\n"
-                elif anim_type == "cast_shadow":
-                    anim_code += f"            Transform({element_id}, {element_id}),\n"
+                timed.append(TimedAnimation(
+                    self._animation_code(refs[id(element)], animation),
+                    self._animation_code(refs[id(element)], animation, run_time=duration),
+                    animation.get("delay", 0),
+                    duration,
+                    self._instant_code(refs[id(element)], animation)
+                ))
+        
+        # Delays are absolute; the timeline turns them into waits between batches
+        timeline = self.scheduler.schedule(timed)
+        for batch in timeline.batches:
+            if batch.wait_before > 0:
+                code += f"        self.wait({batch.wait_before:.4g})\n"
+            code += self._generate_play_batch(batch)
+        
+        return code, timeline.total_duration
+    
+    def _lagged_animation(self, 
+                          name: str, 
+                          animation: Dict[str, Any], 
+                          stagger: float, 
+                          count: int) -> TimedAnimation:
+        """A staggered point cloud plays as one LaggedStart over its group."""
+        duration = animation.get("duration", 1.0)
+        run_time = stagger * (count - 1) + duration
+        if duration > 0:
+            lagged = (f"LaggedStart(*[{self._animation_code('point', animation)} for point in {name}], "
+                      f"lag_ratio={stagger / duration:.4g}")
+        else:
+            # Instant animations give LaggedStart no length to lag by, so each
+            # point waits out its own offset instead
+            instant = self._animation_code('point', animation, run_time=0)
+            lagged = (f"AnimationGroup(*[Succession(Wait(run_time={stagger:.4g} * i), {instant}) if i else {instant} "
+                      f"for i, point in enumerate({name})]")
+        return TimedAnimation(lagged + ")", f"{lagged}, run_time={run_time:.4g})",
+                              animation.get("delay", 0), run_time,
+                              f"*[{self._instant_code('point', animation)} for point in {name}]")
+    
+    def _generate_play_batch(self, batch: TimelineBatch) -> str:
+        """Generate one self.play() call for a batch of overlapping animations."""
+        animations = batch.animations
+        if batch.duration <= 0:
+            # Manim cannot play zero-length animations; show their end state instead
+            return f"        self.add({', '.join(animation.instant for animation in animations)})\n\n"
+        stagger = batch.uniform_stagger()
+        
+        code = "        self.play(\n"
+        if len(animations) == 1 or stagger == 0:
+            # Everything starts together and runs equally long
+            for animation in animations:
+                code += f"            {animation.code},\n"
+            code += f"            run_time={batch.duration:.4g}\n"
+        elif stagger is not None:
+            code += "            LaggedStart(\n"
+            for animation in animations:
+                code += f"                {animation.code},\n"
+            code += f"                lag_ratio={stagger / animations[0].duration:.4g}\n"
+            code += "            ),\n"
+            code += f"            run_time={batch.duration:.4g}\n"
+        else:
+            # Irregular overlap: offset each animation inside one group
+            code += "            AnimationGroup(\n"
+            for animation in animations:
+                offset = animation.start - batch.start
+                if offset > 0:
+                    code += f"                Succession(Wait(run_time={offset:.4g}), {animation.timed_code}),\n"
                 else:
-                    anim_code += f"            FadeIn({element_id}),\n"
-            
-            anim_code += f"            run_time={duration}\n"
-            anim_code += "        )\n\n"
-            
-            code += anim_code
+                    code += f"                {animation.timed_code},\n"
+            code += "            )\n"
+        code += "        )\n\n"
         
         return code
     
+    def _animation_code(self, 
+                        target: str, 
+                        animation: Dict[str, Any], 
+                        run_time: Optional[float] = None) -> str:
+        """Generate the Manim animation expression for one target."""
+        anim_type = animation.get("type", "fade_in")
+        timing = f", run_time={run_time:.4g}" if run_time is not None else ""
+        
+        if anim_type == "fade_in":
+            return f"FadeIn({target}{timing})"
+        elif anim_type == "grow_arrow":
+            return f"GrowArrow({target}{timing})"
+        elif anim_type == "scale":
+            scale_to = animation.get("to", 1.2)
+            if run_time is not None:
+                return f"{target}.animate(run_time={run_time:.4g}).scale({scale_to})"
+            return f"{target}.animate.scale({scale_to})"
+        elif anim_type == "cast_shadow":
+            return f"Transform({target}, {target}{timing})"
+        else:
+            return f"FadeIn({target}{timing})"
+    
+    def _instant_code(self, target: str, animation: Dict[str, Any]) -> str:
+        """Generate an expression for the target as it looks after the animation."""
+        if animation.get("type", "fade_in") == "scale":
+            return f"{target}.scale({animation.get('to', 1.2)})"
+        return target
+    
+    def _uniform_stagger(self, points: List[VisualElement]) -> Optional[float]:
+        """Return the delay step if the points play one shared, evenly staggered animation."""
+        if any(len(p.animation_sequence) != 1 for p in points):
+            return None
+        
+        first = points[0].animation_sequence[0]
+        shape = (first.get("type", "fade_in"), first.get("duration", 1.0))
+        delays = [p.animation_sequence[0].get("delay", 0) for p in points]
+        if any((a.get("type", "fade_in"), a.get("duration", 1.0)) != shape
+               for a in (p.animation_sequence[0] for p in points)):
+            return None
+        if shape[1] <= 0:
+            return None
+        
+        step = delays[1] - delays[0]
+        if step < 0 or any(abs((b - a) - step) > 1e-9 for a, b in zip(delays, delays[1:])):
+            return None
+        return step
+    
     def _generate_camera_movements(self, movements: List[Dict[str, Any]]) -> str:
         """Generate camera movement code."""
         code = """
@@ -1,10 +1,26 @@
 """
 ConceptParser: Identifies key entities and concepts from text input for ML visualization.
 """
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterable, Iterator, TextIO, Union
+from dataclasses import dataclass, field
 from enum import Enum
-import re
+from entity_matcher import MentionStats, COOCCURRENCE_WINDOW
+from ontology import Ontology, load_ontology
+
+
+# Bump when parsing changes, invalidating cached parse results
+PARSER_VERSION = 1
+
+# Characters read per chunk from a file handle
+READ_CHUNK_CHARS = 65_536
+
+# iter_parse yields partial concepts after roughly this much new text
+PARTIAL_RESULT_CHARS = 262_144
+
+# Most co-occurring concepts listed as a concept's relationships
+MAX_RELATIONSHIPS = 5
+
+TextSource = Union[str, TextIO, Iterable[str]]
 
 
 class ConceptType(Enum):
@@ -22,69 +38,74 @@ class ParsedConcept:
     visual_properties: Dict[str, Any]
     relationships: List[str]
     importance_score: float
+    # Co-occurrence edge weight to each related concept mentioned nearby
+    relationship_weights: Dict[str, float] = field(default_factory=dict)
+    first_position: int = 0  # token index of the first mention
 
 
 class ConceptParser:
     """Parses text input to identify key concepts for visualization."""
     
-    def __init__(self):
-        self.pca_entities = {
-            # Mathematical entities
-            "variance": ConceptType.MATHEMATICAL_ENTITY,
-            "eigenvalue": ConceptType.MATHEMATICAL_ENTITY,
-            "eigenvector": ConceptType.MATHEMATICAL_ENTITY,
-            "principal_component": ConceptType.MATHEMATICAL_ENTITY,
-            "covariance_matrix": ConceptType.MATHEMATICAL_ENTITY,
-            "projection": ConceptType.MATHEMATICAL_ENTITY,
-            "dimensionality": ConceptType.MATHEMATICAL_ENTITY,
-            
-            # Visual elements
-            "data_points": ConceptType.VISUAL_ELEMENT,
-            "scatter_plot": ConceptType.VISUAL_ELEMENT,
-            "arrow": ConceptType.VISUAL_ELEMENT,
-            "axis": ConceptType.VISUAL_ELEMENT,
-            "cloud": ConceptType.VISUAL_ELEMENT,
-            "surface": ConceptType.VISUAL_ELEMENT,
-            "shadow": ConceptType.VISUAL_ELEMENT,
-            
-            # Process steps
-            "transformation": ConceptType.PROCESS_STEP,
-            "rotation": ConceptType.PROCESS_STEP,
-            "reduction": ConceptType.PROCESS_STEP,
-            "decomposition": ConceptType.PROCESS_STEP,
-            
-            # Data structures
-            "dataset": ConceptType.DATA_STRUCTURE,
-            "matrix": ConceptType.DATA_STRUCTURE,
-            "vector": ConceptType.DATA_STRUCTURE,
-        }
+    def __init__(self, topic: str = "pca"):
+        # Default vocabulary; ontologies are compiled and loaded on first use
+        self.topic = topic
         
-        self.visual_mappings = {
-            "variance": {"color": "BLUE", "animation": "pulse", "shape": "ellipse"},
-            "data_points": {"color": "WHITE", "animation": "fade_in", "shape": "dot"},
-            "principal_component": {"color": "RED", "animation": "grow_arrow", "shape": "arrow"},
-            "projection": {"color": "YELLOW", "animation": "transform", "shape": "line"},
-            "shadow": {"color": "GRAY", "animation": "cast_shadow", "shape": "silhouette"},
-        }
+        self.cooccurrence_window = COOCCURRENCE_WINDOW
     
-    def parse_text(self, text: str) -> List[ParsedConcept]:
+    def parse_text(self, text: str, topic: Optional[str] = None) -> List[ParsedConcept]:
         """Parse input text and extract relevant concepts."""
+        return self.parse_stream([text], topic)
+    
+    def parse_stream(self, source: TextSource, topic: Optional[str] = None) -> List[ParsedConcept]:
+        """Parse text from a string, a file handle or an iterable of chunks."""
         concepts = []
-        text_lower = text.lower()
+        for concepts in self.iter_parse(source, topic, partial_chars=0):
+            pass
+        return concepts
+    
+    def iter_parse(self, 
+                   source: TextSource, 
+                   topic: Optional[str] = None,
+                   partial_chars: int = PARTIAL_RESULT_CHARS) -> Iterator[List[ParsedConcept]]:
+        """Parse streamed text, yielding the concepts found so far as it goes.
+        
+        A concept list is yielded after every ``partial_chars`` characters (0
+        disables partial results), and a final one once the text ends. Only
+        the current chunk and per-entity counts are held in memory.
+        ``topic`` picks the vocabulary (default: the parser's topic).
+        """
+        ontology = load_ontology(topic or self.topic)
+        stream = ontology.matcher.stream()
+        stats = MentionStats(self.cooccurrence_window)
+        unreported = 0
+        for chunk in _iter_chunks(source):
+            stats.add(stream.feed(chunk), stream.n_tokens)
+            unreported += len(chunk)
+            if partial_chars and unreported >= partial_chars:
+                unreported = 0
+                yield self._build_concepts(ontology, stats)
         
-        # Find entities in text
-        for entity, concept_type in self.pca_entities.items():
-            if entity.replace("_", " ") in text_lower or entity in text_lower:
-                visual_props = self.visual_mappings.get(entity, {})
-                importance = self._calculate_importance(entity, text_lower)
+        stats.add(stream.close(), stream.n_tokens)
+        yield self._build_concepts(ontology, stats)
+    
+    def _build_concepts(self, ontology: Ontology, stats: MentionStats) -> List[ParsedConcept]:
+        """Concepts for every entity mentioned so far."""
+        concepts = []
+        for entity, concept_type in ontology.entity_types.items():
+            if stats.counts[entity]:
+                visual_props = dict(ontology.visual_mappings.get(entity, {}))
+                importance = self._calculate_importance(entity, ontology, stats)
                 
+                neighbours = stats.neighbours(entity)
                 concept = ParsedConcept(
                     name=entity,
-                    concept_type=concept_type,
-                    description=self._get_description(entity),
+                    concept_type=ConceptType(concept_type),
+                    description=self._get_description(entity, ontology),
                     visual_properties=visual_props,
-                    relationships=self._find_relationships(entity, text_lower),
-                    importance_score=importance
+                    relationships=self._find_relationships(entity, ontology, stats),
+                    importance_score=importance,
+                    relationship_weights={other: round(weight, 3) for other, weight in neighbours},
+                    first_position=stats.first_token[entity]
                 )
                 concepts.append(concept)
         
@@ -92,43 +113,40 @@ class ConceptParser:
         concepts.sort(key=lambda x: x.importance_score, reverse=True)
         return concepts
     
-    def _calculate_importance(self, entity: str, text: str) -> float:
+    def _calculate_importance(self, entity: str, ontology: Ontology, stats: MentionStats) -> float:
         """Calculate importance score based on frequency and context."""
-        count = text.count(entity.replace("_", " "))
-        count += text.count(entity)
+        count = stats.counts[entity]
         
-        # Boost score for key PCA concepts
-        key_concepts = ["principal_component", "variance", "data_points", "projection"]
-        if entity in key_concepts:
+        # Boost score for the topic's key concepts
+        if entity in ontology.key_concepts:
             count *= 2
         
-        return min(count / len(text.split()) * 100, 1.0)
+        return min(count / max(stats.n_tokens, 1) * 100, 1.0)
     
-    def _get_description(self, entity: str) -> str:
+    def _get_description(self, entity: str, ontology: Ontology) -> str:
         """Get description for entity."""
-        descriptions = {
-            "variance": "Measure of data spread",
-            "principal_component": "Direction of maximum variance",
-            "data_points": "Individual observations in dataset",
-            "projection": "Mapping to lower dimensional space",
-            "shadow": "2D representation of 3D data",
-            "eigenvalue": "Importance of principal component",
-            "eigenvector": "Direction of principal component",
-        }
-        return descriptions.get(entity, f"Concept: {entity}")
+        return ontology.descriptions.get(entity, f"Concept: {entity}")
     
-    def _find_relationships(self, entity: str, text: str) -> List[str]:
-        """Find related concepts mentioned near this entity."""
-        relationships = {
-            "variance": ["data_points", "principal_component"],
-            "principal_component": ["variance", "eigenvalue", "eigenvector"],
-            "data_points": ["variance", "scatter_plot", "cloud"],
-            "projection": ["shadow", "dimensionality", "transformation"],
-        }
-        return relationships.get(entity, [])
+    def _find_relationships(self, entity: str, ontology: Ontology, stats: MentionStats) -> List[str]:
+        """Find related concepts mentioned near this entity.
+        
+        The strongest co-occurrence edges come first; an entity mentioned
+        apart from every other falls back to the ontology's related concepts.
+        """
+        neighbours = [other for other, _ in stats.neighbours(entity)[:MAX_RELATIONSHIPS]]
+        return neighbours or list(ontology.relationships.get(entity, []))
+
+
+def _iter_chunks(source: TextSource) -> Iterator[str]:
+    if isinstance(source, str):
+        yield source
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(READ_CHUNK_CHARS), "")
+    else:
+        yield from source
 
 
 def parse_pca_concept(text: str) -> List[ParsedConcept]:
     """Convenience function to parse PCA-related text."""
-    parser = ConceptParser()
+    parser = ConceptParser("pca")
     return parser.parse_text(text)
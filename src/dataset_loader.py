@@ -0,0 +1,186 @@
+"""
+Dataset Loader: Out-of-core access to user feature matrices.
+
+``.npy`` files and uncompressed ``.npz`` members are memory-mapped, and CSV
+files are parsed in chunks, so only the selected columns of one block of rows
+is in memory at a time.
+"""
+from typing import List, Optional, Iterator, Sequence, Union
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+import zipfile
+import numpy as np
+
+
+# Rows per block when streaming a dataset
+DEFAULT_CHUNK_ROWS = 65_536
+
+Column = Union[int, str]
+
+
+@dataclass
+class Dataset:
+    """A 2-D feature matrix on disk, read block by block."""
+    path: Path
+    columns: List[str]  # names of the selected columns
+    n_rows: int
+    _array: Optional[np.ndarray] = field(default=None, repr=False)  # memmap for npy/npz
+    _csv_indices: Optional[List[int]] = field(default=None, repr=False)
+    _csv_has_header: bool = field(default=False, repr=False)
+    _array_indices: Optional[List[int]] = field(default=None, repr=False)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    @property
+    def identity(self) -> str:
+        """Cheap key for caches: the file, its size and mtime, and the selection."""
+        stat = self.path.stat()
+        return f"{self.path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:{','.join(self.columns)}"
+
+    def iter_chunks(self, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[np.ndarray]:
+        """Yield the selected columns as float64 blocks of at most chunk_rows rows."""
+        if self._array is not None:
+            for start in range(0, self.n_rows, chunk_rows):
+                block = self._array[start:start + chunk_rows]
+                if self._array_indices is not None:
+                    block = block[:, self._array_indices]
+                yield np.asarray(block, dtype=np.float64)
+            return
+
+        with open(self.path, newline="") as f:
+            if self._csv_has_header:
+                next(f)
+            while True:
+                lines = list(islice(f, chunk_rows))
+                if not lines:
+                    break
+                yield np.loadtxt(lines, delimiter=",", usecols=self._csv_indices,
+                                 ndmin=2, dtype=np.float64)
+
+    def sample_rows(self, n: int, seed: int = 0, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+        """Uniform sample of n rows in one pass."""
+        sampler = ReservoirSampler(n, self.n_features, seed)
+        for chunk in self.iter_chunks(chunk_rows):
+            sampler.update(chunk)
+        return sampler.sample
+
+
+class ReservoirSampler:
+    """Uniform fixed-size row sample of a stream of blocks (Algorithm R)."""
+
+    def __init__(self, size: int, n_features: int, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.sample = np.empty((0, n_features))
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: np.ndarray) -> None:
+        if len(self.sample) < self.size:
+            take = min(self.size - len(self.sample), len(chunk))
+            self.sample = np.vstack([self.sample, chunk[:take]])
+            chunk = chunk[take:]
+            self.seen += take
+        if len(chunk):
+            # Row t (0-based) replaces a random slot with probability size / (t + 1)
+            slots = (self._rng.random(len(chunk)) * (self.seen + 1 + np.arange(len(chunk)))).astype(np.int64)
+            keep = slots < self.size
+            # Later rows overwrite earlier ones in the same slot, as in the sequential algorithm
+            self.sample[slots[keep]] = chunk[keep]
+            self.seen += len(chunk)
+
+
+def load_dataset(path: Union[str, Path],
+                 columns: Optional[Sequence[Column]] = None,
+                 member: Optional[str] = None) -> Dataset:
+    """Open a .npy, .npz or .csv feature matrix without reading it into memory.
+
+    ``columns`` selects features by index, or by header name for CSV files.
+    ``member`` picks an array from an .npz archive (default: the first one).
+    """
+    path = Path(path).expanduser()
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        array = np.load(path, mmap_mode="r")
+    elif suffix == ".npz":
+        array = _map_npz_member(path, member)
+    elif suffix == ".csv":
+        return _open_csv(path, columns)
+    else:
+        raise ValueError(f"Unsupported dataset format: {path.suffix} (use .npy, .npz or .csv)")
+
+    if array.ndim != 2:
+        raise ValueError(f"Expected a 2-D feature matrix in {path}, got shape {array.shape}")
+
+    indices = None
+    names = [str(i) for i in range(array.shape[1])]
+    if columns is not None:
+        indices = [_column_index(c, names) for c in columns]
+        names = [names[i] for i in indices]
+    return Dataset(path, names, array.shape[0], _array=array, _array_indices=indices)
+
+
+def _map_npz_member(path: Path, member: Optional[str]) -> np.ndarray:
+    """Memory-map one array of an .npz archive, if it is stored uncompressed."""
+    with zipfile.ZipFile(path) as archive:
+        names = [name for name in archive.namelist() if name.endswith(".npy")]
+        if not names:
+            raise ValueError(f"No arrays found in {path}")
+        name = f"{member}.npy" if member else names[0]
+        info = archive.getinfo(name)
+
+        if info.compress_type != zipfile.ZIP_STORED:
+            # np.savez_compressed members cannot be mapped; read just this one
+            print(f"   ⚠️  {path.name}:{name} is compressed; loading it into memory")
+            with archive.open(info) as f:
+                return np.lib.format.read_array(f)
+
+    # The member's data follows its local file header (30 bytes plus the
+    # variable-length name and extra fields) and the .npy header
+    with open(path, "rb") as f:
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(f.read(4), dtype="<u2")
+        f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def _open_csv(path: Path, columns: Optional[Sequence[Column]]) -> Dataset:
+    """Inspect a CSV file's header and size without parsing its values."""
+    with open(path, newline="") as f:
+        first = f.readline()
+        fields = [value.strip() for value in first.rstrip("\r\n").split(",")]
+        has_header = not all(_is_number(value) for value in fields)
+        n_rows = sum(1 for line in f if line.strip()) + (0 if has_header else 1)
+
+    names = fields if has_header else [str(i) for i in range(len(fields))]
+    indices = list(range(len(names))) if columns is None else [_column_index(c, names) for c in columns]
+    return Dataset(path, [names[i] for i in indices], n_rows,
+                   _csv_indices=indices, _csv_has_header=has_header)
+
+
+def _column_index(column: Column, names: List[str]) -> int:
+    if isinstance(column, int):
+        if not -len(names) <= column < len(names):
+            raise ValueError(f"Column index {column} out of range for {len(names)} columns")
+        return column % len(names)
+    if column not in names:
+        raise ValueError(f"Unknown column: {column}")
+    return names.index(column)
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
@@ -0,0 +1,368 @@
+"""
+Decomposition: PCA of the datasets shown in the visualizations.
+
+Results are cached by dataset fingerprint, so every scene that draws the same
+points reuses one decomposition. Datasets on disk are decomposed block by
+block, with a randomized truncated decomposition for wide feature matrices,
+and their results can also be cached on disk.
+"""
+from typing import Optional, Iterable, Tuple, Callable
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import itertools
+import os
+import tempfile
+import numpy as np
+from fingerprint import fingerprint
+
+
+# Above this many matrix entries (N x D) the top components come from a
+# randomized SVD instead of a full one
+RANDOMIZED_SVD_MIN_SIZE = 2_000_000
+
+# Up to this many features a dataset's covariance is accumulated and solved
+# exactly; wider data uses a streaming randomized decomposition
+EXACT_COVARIANCE_MAX_FEATURES = 256
+
+# Components kept from a randomized decomposition; the scree reports the rest
+# as one remainder
+RANDOMIZED_COMPONENTS = 20
+
+# Number of decompositions kept in memory
+PCA_CACHE_SIZE = 32
+
+# Bump when decompositions change, invalidating results cached on disk
+DECOMPOSITION_VERSION = 1
+
+_pca_cache: "OrderedDict[str, PCAResult]" = OrderedDict()
+
+
+@dataclass
+class PCAResult:
+    mean: np.ndarray  # (D,)
+    components: np.ndarray  # (k, D), unit principal axes as rows
+    explained_variance: np.ndarray  # (k,)
+    explained_variance_ratio: np.ndarray  # (k,)
+    singular_values: np.ndarray  # (k,)
+    n_samples: int
+    method: str = "svd"  # "svd", "randomized" or "covariance"
+
+    def axis_length(self, index: int, n_std: float = 2.0) -> float:
+        """Length covering ``n_std`` standard deviations along one axis."""
+        return n_std * float(np.sqrt(self.explained_variance[index]))
+
+    def remaining_variance_ratio(self) -> float:
+        """Share of the variance outside the kept components."""
+        return max(0.0, 1.0 - float(np.sum(self.explained_variance_ratio)))
+    
+    def basis(self) -> np.ndarray:
+        """Right-handed 3x3 basis of PC1, PC2 and their normal, as rows."""
+        pc1, pc2 = self.components[0], self.components[1]
+        return np.array([pc1, pc2, np.cross(pc1, pc2)])
+
+
+def compute_pca(data: np.ndarray, n_components: Optional[int] = None, seed: int = 0) -> PCAResult:
+    """PCA of ``data`` (N x D), cached by the data's fingerprint."""
+    data = np.asarray(data, dtype=float)
+    n_components = min(n_components or data.shape[1], *data.shape)
+
+    key = f"{fingerprint(data)}:{n_components}:{seed}"
+    if key in _pca_cache:
+        _pca_cache.move_to_end(key)
+        return _pca_cache[key]
+
+    mean = data.mean(axis=0)
+    centered = data - mean
+    if data.size >= RANDOMIZED_SVD_MIN_SIZE and n_components < min(data.shape):
+        singular_values, components = _randomized_svd(centered, n_components, seed)
+    else:
+        _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+        singular_values, components = singular_values[:n_components], components[:n_components]
+
+    # Fix each axis' sign so its largest coordinate is positive, as the
+    # generated scenes do
+    largest = np.argmax(np.abs(components), axis=1)
+    components = components * np.sign(components[np.arange(len(components)), largest])[:, None]
+
+    n_samples = len(data)
+    explained_variance = singular_values ** 2 / max(n_samples - 1, 1)
+    total_variance = float(np.sum(centered ** 2)) / max(n_samples - 1, 1)
+    result = PCAResult(
+        mean=mean,
+        components=components,
+        explained_variance=explained_variance,
+        explained_variance_ratio=(explained_variance / total_variance if total_variance
+                                  else np.zeros_like(explained_variance)),
+        singular_values=singular_values,
+        n_samples=n_samples
+    )
+
+    _remember(key, result)
+    return result
+
+
+def compute_pca_streaming(chunks: Callable[[], Iterable[np.ndarray]],
+                          n_components: Optional[int] = None,
+                          cache_key: Optional[str] = None,
+                          cache_dir: Optional[Path] = None,
+                          n_iter: int = 2,
+                          seed: int = 0) -> PCAResult:
+    """PCA from row blocks without holding the rows in memory.
+
+    ``chunks`` is called once per pass over the data and must yield the same
+    blocks each time. Up to EXACT_COVARIANCE_MAX_FEATURES features, one pass
+    accumulates the covariance and solves it exactly. Wider data gets a
+    randomized truncated decomposition in ``n_iter + 2`` passes that only
+    holds D x (k + oversampling) matrices.
+
+    ``cache_key`` identifies the data for the in-memory cache and, with
+    ``cache_dir``, for a disk cache reused across runs; hashing the rows
+    would need another pass.
+    """
+    key = None
+    if cache_key is not None:
+        key = f"{cache_key}:{n_components}:{n_iter}:{seed}:v{DECOMPOSITION_VERSION}"
+        if key in _pca_cache:
+            _pca_cache.move_to_end(key)
+            return _pca_cache[key]
+        cached = _load_cached_pca(cache_dir, key)
+        if cached is not None:
+            _remember(key, cached)
+            return cached
+
+    # The first pass tells the width; the exact path needs no other pass
+    first_pass = iter(chunks())
+    first = next((chunk for chunk in first_pass if len(chunk)), None)
+    if first is None:
+        raise ValueError("PCA needs at least two rows of data")
+
+    if first.shape[1] <= EXACT_COVARIANCE_MAX_FEATURES:
+        result = _streaming_covariance_pca(itertools.chain([first], first_pass), n_components)
+    else:
+        result = _streaming_randomized_pca(itertools.chain([first], first_pass), chunks,
+                                           n_components or RANDOMIZED_COMPONENTS, n_iter, seed)
+
+    if key is not None:
+        _remember(key, result)
+        _save_cached_pca(cache_dir, key, result)
+    return result
+
+
+def _streaming_covariance_pca(blocks: Iterable[np.ndarray], n_components: Optional[int]) -> PCAResult:
+    """Exact PCA from one pass of sums and scatter matrices.
+
+    Blocks are accumulated around the first block's mean, which keeps the
+    covariance numerically stable for data far from the origin.
+    """
+    shift = None
+    n_samples = 0
+    total = None
+    scatter = None
+    for chunk in blocks:
+        if not len(chunk):
+            continue
+        if shift is None:
+            shift = chunk.mean(axis=0)
+            total = np.zeros_like(shift)
+            scatter = np.zeros((len(shift), len(shift)))
+        shifted = chunk - shift
+        n_samples += len(chunk)
+        total += shifted.sum(axis=0)
+        scatter += shifted.T @ shifted
+
+    if n_samples < 2:
+        raise ValueError("PCA needs at least two rows of data")
+
+    mean_offset = total / n_samples
+    covariance = (scatter - n_samples * np.outer(mean_offset, mean_offset)) / (n_samples - 1)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+
+    # eigh returns ascending eigenvalues; PCA wants the largest first
+    order = np.argsort(eigenvalues)[::-1][:n_components or len(eigenvalues)]
+    return _pca_from_eigen(shift + mean_offset, eigenvectors[:, order].T, eigenvalues[order],
+                           float(np.trace(covariance)), n_samples, "covariance")
+
+
+def _streaming_randomized_pca(first_pass: Iterable[np.ndarray],
+                              chunks: Callable[[], Iterable[np.ndarray]],
+                              n_components: int,
+                              n_iter: int,
+                              seed: int) -> PCAResult:
+    """Randomized subspace iteration on the covariance, one pass per product.
+
+    Each pass computes C @ Q for the centered covariance C as a sum of
+    per-block products, so only D x l matrices are kept (l = k + 10).
+    """
+    rng = np.random.default_rng(seed)
+    shift = None
+    n_samples = 0
+    total = None
+    squares = None
+    product = None
+    basis = None
+
+    # Pass 1: row count, mean, total variance and the first sketch
+    for chunk in first_pass:
+        if not len(chunk):
+            continue
+        if shift is None:
+            shift = chunk.mean(axis=0)
+            n_features = len(shift)
+            n_components = min(n_components, n_features)
+            basis = rng.standard_normal((n_features, min(n_components + 10, n_features)))
+            total = np.zeros(n_features)
+            squares = np.zeros(n_features)
+            product = np.zeros_like(basis)
+        shifted = chunk - shift
+        n_samples += len(chunk)
+        total += shifted.sum(axis=0)
+        squares += np.einsum("ij,ij->j", shifted, shifted)
+        product += shifted.T @ (shifted @ basis)
+
+    if n_samples < 2:
+        raise ValueError("PCA needs at least two rows of data")
+
+    mean_offset = total / n_samples
+    total_variance = float(np.sum(squares - n_samples * mean_offset ** 2)) / (n_samples - 1)
+
+    def centered(product: np.ndarray, basis: np.ndarray) -> np.ndarray:
+        # Scatter around the true mean from scatter around the shift
+        return product - n_samples * np.outer(mean_offset, mean_offset @ basis)
+
+    def covariance_times(basis: np.ndarray) -> np.ndarray:
+        product = np.zeros_like(basis)
+        for chunk in chunks():
+            shifted = chunk - shift
+            product += shifted.T @ (shifted @ basis)
+        return centered(product, basis) / (n_samples - 1)
+
+    # Power iterations sharpen the spectrum, then Rayleigh-Ritz on the subspace
+    basis, _ = np.linalg.qr(centered(product, basis))
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(covariance_times(basis))
+    projected = basis.T @ covariance_times(basis)
+    eigenvalues, eigenvectors = np.linalg.eigh((projected + projected.T) / 2)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+
+    return _pca_from_eigen(shift + mean_offset, (basis @ eigenvectors[:, order]).T, eigenvalues[order],
+                           total_variance, n_samples, "randomized")
+
+
+def _pca_from_eigen(mean: np.ndarray,
+                    components: np.ndarray,
+                    eigenvalues: np.ndarray,
+                    total_variance: float,
+                    n_samples: int,
+                    method: str) -> PCAResult:
+    """Assemble a PCAResult from covariance eigenpairs."""
+    explained_variance = np.clip(eigenvalues, 0, None)
+    largest = np.argmax(np.abs(components), axis=1)
+    components = components * np.sign(components[np.arange(len(components)), largest])[:, None]
+    return PCAResult(
+        mean=mean,
+        components=components,
+        explained_variance=explained_variance,
+        explained_variance_ratio=(explained_variance / total_variance if total_variance > 0
+                                  else np.zeros_like(explained_variance)),
+        singular_values=np.sqrt(explained_variance * (n_samples - 1)),
+        n_samples=n_samples,
+        method=method
+    )
+
+
+def _remember(key: str, result: PCAResult) -> None:
+    _pca_cache[key] = result
+    while len(_pca_cache) > PCA_CACHE_SIZE:
+        _pca_cache.popitem(last=False)
+
+
+def _cache_file(cache_dir: Path, key: str) -> Path:
+    return Path(cache_dir) / f"{hashlib.sha1(key.encode()).hexdigest()}.npz"
+
+
+def _load_cached_pca(cache_dir: Optional[Path], key: str) -> Optional[PCAResult]:
+    """Read a decomposition saved by an earlier run, if there is one."""
+    if cache_dir is None or not _cache_file(cache_dir, key).exists():
+        return None
+    with np.load(_cache_file(cache_dir, key)) as saved:
+        return PCAResult(
+            mean=saved["mean"],
+            components=saved["components"],
+            explained_variance=saved["explained_variance"],
+            explained_variance_ratio=saved["explained_variance_ratio"],
+            singular_values=saved["singular_values"],
+            n_samples=int(saved["n_samples"]),
+            method=str(saved["method"])
+        )
+
+
+def _save_cached_pca(cache_dir: Optional[Path], key: str, result: PCAResult) -> None:
+    """Save a decomposition atomically so concurrent runs never read a partial file."""
+    if cache_dir is None:
+        return
+    path = _cache_file(cache_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, mean=result.mean, components=result.components,
+                 explained_variance=result.explained_variance,
+                 explained_variance_ratio=result.explained_variance_ratio,
+                 singular_values=result.singular_values,
+                 n_samples=result.n_samples, method=result.method)
+    os.replace(tmp_name, path)
+
+
+def to_display_space(pca: PCAResult, points: np.ndarray, extent: float = 3.0) -> Tuple[np.ndarray, PCAResult]:
+    """Map sampled rows and their PCA into scene coordinates.
+
+    Points are centered on the data mean and expressed on the top three
+    principal axes (padded with zeros below three features), then scaled so
+    two standard deviations along PC1 span ``extent`` scene units. Returns
+    the (n, 3) display points and the PCA expressed in the same coordinates.
+    """
+    if pca.components.shape == (3, 3):
+        # Three raw features are shown as they are, with the axes drawn in them
+        coords = points - pca.mean
+        axes = pca.components
+    else:
+        k = min(3, len(pca.components))
+        coords = (points - pca.mean) @ pca.components[:k].T
+        axes = np.eye(3)[:k]
+    k = len(axes)
+
+    scale = extent / (2 * float(np.sqrt(pca.explained_variance[0]))) if pca.explained_variance[0] > 0 else 1.0
+    display = np.zeros((len(points), 3))
+    display[:, :coords.shape[1]] = coords * scale
+
+    display_pca = PCAResult(
+        mean=np.zeros(3),
+        components=axes,
+        explained_variance=pca.explained_variance[:k] * scale ** 2,
+        explained_variance_ratio=pca.explained_variance_ratio[:k],
+        singular_values=pca.singular_values[:k] * scale,
+        n_samples=pca.n_samples,
+        method=pca.method
+    )
+    return display, display_pca
+
+
+def _randomized_svd(centered: np.ndarray, k: int, seed: int, oversamples: int = 10, n_iter: int = 4):
+    """Top-k singular values and right singular vectors (Halko et al.)."""
+    rng = np.random.default_rng(seed)
+    sketch = centered @ rng.standard_normal((centered.shape[1], min(k + oversamples, centered.shape[1])))
+    basis, _ = np.linalg.qr(sketch)
+
+    # Power iterations sharpen the spectrum for slowly decaying singular values
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(centered.T @ basis)
+        basis, _ = np.linalg.qr(centered @ basis)
+
+    _, singular_values, components = np.linalg.svd(basis.T @ centered, full_matrices=False)
+    return singular_values[:k], components[:k]
+
+
+def clear_pca_cache() -> None:
+    """Forget every cached decomposition."""
+    _pca_cache.clear()
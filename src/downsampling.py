@@ -0,0 +1,116 @@
+"""
+Downsampling: Picks the subset of a large point cloud that the scenes draw.
+
+The PCA is always fitted on the full dataset; these strategies only bound how
+many points are rendered. All of them work on display-space (N, 3) points and
+return sorted row indices, at most ``budget`` of them.
+"""
+from typing import Callable, Dict
+import numpy as np
+
+
+DOWNSAMPLE_STRATEGIES = ("reservoir", "voxel", "density")
+
+# Non-uniform strategies choose from a uniform candidate pool this many times
+# the display budget, capped so the pool stays small in memory
+CANDIDATE_POOL_FACTOR = 20
+MAX_CANDIDATE_POOL = 200_000
+
+# The pool holds raw float64 rows, so wide datasets are capped by size too
+MAX_CANDIDATE_POOL_BYTES = 256 * 2**20
+
+
+def downsample(points: np.ndarray, budget: int, strategy: str = "reservoir", seed: int = 0) -> np.ndarray:
+    """Indices of at most ``budget`` points chosen with the given strategy."""
+    if strategy not in _STRATEGIES:
+        raise ValueError(f"Unknown downsample strategy: {strategy} (use one of {', '.join(DOWNSAMPLE_STRATEGIES)})")
+    if len(points) <= budget:
+        return np.arange(len(points))
+    return np.sort(_STRATEGIES[strategy](points, budget, np.random.default_rng(seed)))
+
+
+def candidate_pool_size(budget: int, strategy: str, n_features: int = 3) -> int:
+    """How many uniformly sampled rows of ``n_features`` a strategy should choose from."""
+    if strategy == "reservoir":
+        return budget
+    max_pool = min(MAX_CANDIDATE_POOL, MAX_CANDIDATE_POOL_BYTES // (8 * max(n_features, 1)))
+    return min(budget * CANDIDATE_POOL_FACTOR, max(max_pool, budget))
+
+
+def reservoir_indices(points: np.ndarray, budget: int, rng: np.random.Generator) -> np.ndarray:
+    """Uniform sample: keeps the density of the data, may drop sparse outliers."""
+    return rng.choice(len(points), size=budget, replace=False)
+
+
+def voxel_indices(points: np.ndarray, budget: int, rng: np.random.Generator) -> np.ndarray:
+    """One point per occupied grid cell, with the finest grid that fits the budget.
+
+    Evens out density, so the shape and extent of the cloud (including its
+    outliers) survive at the cost of how crowded the core looks.
+    """
+    order = rng.permutation(len(points))
+    shuffled = points[order]
+
+    # More cells per axis -> more occupied cells; search for the largest count that fits
+    low, high = 1, 1024
+    best = np.zeros(1, dtype=np.int64)
+    while low <= high:
+        cells = (low + high) // 2
+        _, first = np.unique(_voxel_keys(shuffled, cells), return_index=True)
+        if len(first) <= budget:
+            best, low = first, cells + 1
+        else:
+            high = cells - 1
+    return order[best]
+
+
+def density_indices(points: np.ndarray,
+                    budget: int,
+                    rng: np.random.Generator,
+                    strata: int = 5) -> np.ndarray:
+    """Stratified sample over local density levels.
+
+    Points are binned by the log of their grid-cell occupancy, and each bin
+    receives a share of the budget proportional to its size, but at least
+    one point. The sample keeps the overall density profile while sparse
+    regions are guaranteed a presence.
+    """
+    # Grid fine enough for roughly eight points per cell on average
+    cells = max(2, int(round((len(points) / 8) ** (1 / 3))))
+    _, inverse, counts = np.unique(_voxel_keys(points, cells), return_inverse=True, return_counts=True)
+    log_density = np.log(counts[inverse.ravel()])
+
+    edges = np.linspace(log_density.min(), log_density.max(), strata + 1)[1:-1]
+    stratum = np.searchsorted(edges, log_density, side="right")
+    sizes = np.bincount(stratum, minlength=strata)
+
+    allocation = np.where(sizes > 0, np.maximum(1, np.floor(budget * sizes / len(points))), 0).astype(np.int64)
+    allocation = np.minimum(allocation, sizes)
+    # Hand out the rounding remainder to the largest strata, or take back any excess
+    for s in np.argsort(sizes)[::-1]:
+        spare = budget - allocation.sum()
+        if spare == 0:
+            break
+        allocation[s] = np.clip(allocation[s] + spare, 1 if sizes[s] else 0, sizes[s])
+
+    chosen = np.concatenate([rng.choice(np.flatnonzero(stratum == s), size=allocation[s], replace=False)
+                             for s in range(strata) if allocation[s]])
+    if len(chosen) > budget:
+        # Fewer budget slots than occupied strata
+        chosen = rng.choice(chosen, size=budget, replace=False)
+    return chosen
+
+
+def _voxel_keys(points: np.ndarray, cells: int) -> np.ndarray:
+    """Flattened grid-cell index of each point for a cells^3 grid over its bounds."""
+    low = points.min(axis=0)
+    span = float(np.max(points.max(axis=0) - low)) or 1.0
+    grid = np.clip(((points - low) / span * cells).astype(np.int64), 0, cells - 1)
+    return (grid[:, 0] * cells + grid[:, 1]) * cells + grid[:, 2]
+
+
+_STRATEGIES: Dict[str, Callable[[np.ndarray, int, np.random.Generator], np.ndarray]] = {
+    "reservoir": reservoir_indices,
+    "voxel": voxel_indices,
+    "density": density_indices,
+}
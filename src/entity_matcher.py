@@ -0,0 +1,190 @@
+"""
+Entity Matcher: Finds every mention of a vocabulary of entities in one pass.
+
+Entity names are compiled into a trie over word tokens, so ``principal_component``,
+"principal component" and "Principal Components" are all one entity, and
+"variance" is not found inside "covariance". Each mention records its
+character span and token position for scoring and co-occurrence. Text can
+be fed in chunks, with names split across chunk boundaries still found.
+"""
+from typing import List, Dict, Iterable, Optional, Tuple, Deque
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+import re
+
+
+# Words are runs of letters and digits; underscores and hyphens separate them
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+# Mentions at most this many tokens apart count as co-occurring
+COOCCURRENCE_WINDOW = 20
+
+
+@dataclass
+class Mention:
+    entity: str
+    start: int  # character offset of the first token
+    end: int  # character offset just past the last token
+    token: int  # index of the first token in the text
+
+
+class MentionStats:
+    """Running mention counts and windowed co-occurrence over a stream of mentions.
+    
+    Two mentions of different entities at most ``window`` tokens apart
+    co-occur. Each such pair adds one to the pair's count and a weight that
+    decays linearly with their distance to the edge between the entities.
+    Memory grows with the vocabulary, not the text: only the mentions of the
+    last ``window`` tokens are kept, to pair with the ones that follow.
+    """
+
+    def __init__(self, window: int = COOCCURRENCE_WINDOW):
+        self.window = window
+        self.n_tokens = 0
+        self.counts: Counter = Counter()  # mentions per entity
+        self.first_token: Dict[str, int] = {}  # token position of each entity's first mention
+        self.cooccurrence: Counter = Counter()  # sorted entity pair -> mentions within the window
+        self.edges: Dict[str, Counter] = defaultdict(Counter)  # entity -> neighbour -> weight, symmetric
+        self._recent: Deque[Mention] = deque()
+
+    def add(self, mentions: Iterable[Mention], n_tokens: int) -> None:
+        """Count new mentions, in text order; ``n_tokens`` is the running token total."""
+        for mention in mentions:
+            self.counts[mention.entity] += 1
+            self.first_token.setdefault(mention.entity, mention.token)
+            while self._recent and mention.token - self._recent[0].token > self.window:
+                self._recent.popleft()
+            for other in self._recent:
+                if other.entity != mention.entity:
+                    weight = 1.0 - (mention.token - other.token) / (self.window + 1)
+                    self.cooccurrence[tuple(sorted((other.entity, mention.entity)))] += 1
+                    self.edges[mention.entity][other.entity] += weight
+                    self.edges[other.entity][mention.entity] += weight
+            self._recent.append(mention)
+        self.n_tokens = n_tokens
+
+    def neighbours(self, entity: str) -> List[Tuple[str, float]]:
+        """Entities co-occurring with ``entity``, strongest edge first."""
+        return sorted(self.edges.get(entity, {}).items(), key=lambda item: (-item[1], item[0]))
+
+
+class EntityMatcher:
+    """Token trie over entity names; longest match wins, matches never overlap."""
+
+    def __init__(self, entities: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity: str, phrase: Optional[str] = None) -> None:
+        """Match ``phrase`` (default: the entity name) as ``entity``, in any number."""
+        words = [w.lower() for w in TOKEN_PATTERN.findall(phrase or entity)]
+        if not words:
+            raise ValueError(f"Entity phrase has no words: {phrase or entity!r}")
+
+        # Inflect the last word only: "principal components", "data point"
+        for last in _word_forms(words[-1]):
+            node = self._root
+            for word in words[:-1] + [last]:
+                node = node.setdefault(word, {})
+            node[None] = entity
+
+    def find(self, text: str) -> List[Mention]:
+        """Every entity mention in ``text``, in order."""
+        stream = self.stream()
+        return stream.feed(text) + stream.close()
+
+    def stream(self) -> "MatchStream":
+        """Start matching text that arrives in chunks."""
+        return MatchStream(self._root)
+
+
+class MatchStream:
+    """Incremental matching over text fed chunk by chunk.
+
+    A token touching the end of a chunk may continue in the next one, and a
+    trie walk reaching the last token may still extend to a longer name, so
+    both are held back until more text, or close(), settles them. Only those
+    few tokens are buffered, however long the input is.
+    """
+
+    def __init__(self, root: Dict[str, dict]):
+        self._root = root
+        self._carry = ""  # unfinished token at the end of the last chunk
+        self._offset = 0  # character offset of _carry in the whole input
+        self._pending: List[Tuple[str, int, int, int]] = []  # (word, start, end, index)
+        self.n_tokens = 0  # tokens read so far
+
+    def feed(self, chunk: str) -> List[Mention]:
+        """Mentions settled by this chunk, with offsets into the whole input."""
+        text = self._carry + chunk
+        base = self._offset
+        spans = [(m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+        if spans and spans[-1][1] == len(text):
+            start = spans.pop()[0]
+            self._carry, self._offset = text[start:], base + start
+        else:
+            self._carry, self._offset = "", base + len(text)
+        return self._advance([(text[s:e], base + s, base + e) for s, e in spans], final=False)
+
+    def close(self) -> List[Mention]:
+        """Mentions still pending at the end of the input."""
+        words = [(self._carry, self._offset, self._offset + len(self._carry))] if self._carry else []
+        self._offset += len(self._carry)
+        self._carry = ""
+        return self._advance(words, final=True)
+
+    def _advance(self, words: List[Tuple[str, int, int]], final: bool) -> List[Mention]:
+        for word, start, end in words:
+            self._pending.append((word.lower(), start, end, self.n_tokens))
+            self.n_tokens += 1
+
+        mentions = []
+        pending = self._pending
+        i = 0
+        while i < len(pending):
+            node = self._root
+            match = None
+            extendable = False
+            # Follow the trie as far as the tokens go, remembering the last full name
+            for j in range(i, len(pending)):
+                node = node.get(pending[j][0])
+                if node is None:
+                    break
+                if None in node:
+                    match = (node[None], j)
+            else:
+                # Out of tokens mid-walk: a longer name may follow in the next chunk
+                extendable = not final and any(key is not None for key in node)
+
+            if extendable:
+                break
+            if match is None:
+                i += 1
+                continue
+            entity, last = match
+            mentions.append(Mention(entity, pending[i][1], pending[last][2], pending[i][3]))
+            i = last + 1
+
+        del pending[:i]
+        return mentions
+
+
+def _word_forms(word: str) -> List[str]:
+    """The word with its regular English plural or singular."""
+    forms = {word}
+    if word.endswith("s") and not word.endswith(("ss", "is", "us")):
+        # Plural entity names ("data_points") also match their singular
+        forms.add(word[:-1])
+    elif word.endswith("is"):
+        forms.add(word[:-2] + "es")  # axis -> axes
+    elif word.endswith(("ix", "ex")):
+        forms.add(word[:-2] + "ices")  # matrix -> matrices
+        forms.add(word + "es")
+    elif word.endswith(("s", "x", "z", "ch", "sh")):
+        forms.add(word + "es")
+    elif word.endswith("y") and word[-2:-1] not in "aeiou":
+        forms.add(word[:-1] + "ies")
+    else:
+        forms.add(word + "s")
+    return sorted(forms)
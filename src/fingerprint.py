@@ -0,0 +1,43 @@
+"""
+Fingerprint: Stable content hashes for pipeline data structures.
+"""
+from typing import Any
+from dataclasses import fields, is_dataclass
+from enum import Enum
+import hashlib
+
+
+def fingerprint(obj: Any) -> str:
+    """Hash nested dicts, lists, dataclasses, enums and arrays by content."""
+    digest = hashlib.sha1()
+    _update(digest, obj)
+    return digest.hexdigest()
+
+
+def _update(digest: "hashlib._Hash", obj: Any) -> None:
+    """Feed one object into the digest, tagging each value with its kind."""
+    if isinstance(obj, dict):
+        digest.update(b"{")
+        for key in sorted(obj, key=repr):
+            _update(digest, key)
+            _update(digest, obj[key])
+        digest.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"[" if isinstance(obj, list) else b"(")
+        for item in obj:
+            _update(digest, item)
+        digest.update(b"]")
+    elif isinstance(obj, Enum):
+        digest.update(f"E:{type(obj).__name__}.{obj.name};".encode())
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        digest.update(f"D:{type(obj).__name__}<".encode())
+        for field in fields(obj):
+            digest.update(field.name.encode())
+            _update(digest, getattr(obj, field.name))
+        digest.update(b">")
+    elif hasattr(obj, "tobytes") and hasattr(obj, "dtype") and hasattr(obj, "shape"):
+        # NumPy arrays: repr() truncates large arrays, so hash the raw buffer
+        digest.update(f"A:{obj.dtype}{obj.shape};".encode())
+        digest.update(obj.tobytes())
+    else:
+        digest.update(f"{type(obj).__name__}:{obj!r};".encode())
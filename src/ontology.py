@@ -0,0 +1,125 @@
+"""
+Ontology: Topic vocabularies for ConceptParser, loaded on first use.
+
+Each topic is defined in ``ontologies/<topic>.yaml``. The first load compiles
+it into an index (entity matcher, concept types, descriptions, visual hints
+and relation graph) that is pickled to the user cache directory, so later
+runs skip YAML parsing and trie construction. The index is keyed by a hash
+of the YAML source and the index format, so edits rebuild it automatically.
+"""
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+import hashlib
+import os
+import pickle
+import tempfile
+import yaml
+from entity_matcher import EntityMatcher
+
+
+ONTOLOGY_DIR = Path(__file__).with_name("ontologies")
+
+# Compiled indexes go here; ML_VISUALIZATION_CACHE_DIR overrides the location
+CACHE_DIR_ENV = "ML_VISUALIZATION_CACHE_DIR"
+DEFAULT_CACHE_DIR = Path("~/.cache/ml-visualization")
+
+# Bump when Ontology or EntityMatcher change shape, invalidating pickled indexes
+INDEX_FORMAT_VERSION = 2
+
+_loaded: Dict[str, "Ontology"] = {}
+
+
+@dataclass
+class Ontology:
+    topic: str
+    version: int  # the YAML's own version
+    entity_types: Dict[str, str]  # entity -> ConceptType value, in file order
+    descriptions: Dict[str, str] = field(default_factory=dict)
+    visual_mappings: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    relationships: Dict[str, List[str]] = field(default_factory=dict)
+    key_concepts: List[str] = field(default_factory=list)
+    matcher: EntityMatcher = field(default_factory=EntityMatcher)
+    digest: str = ""  # hash of the YAML source and index format
+
+
+def available_topics() -> List[str]:
+    """Topics with an ontology file."""
+    return sorted(path.stem for path in ONTOLOGY_DIR.glob("*.yaml"))
+
+
+def load_ontology(topic: str, cache_dir: Optional[Path] = None) -> Ontology:
+    """The compiled ontology for ``topic``; loaded once per process."""
+    topic = topic.lower()
+    if topic in _loaded:
+        return _loaded[topic]
+
+    source_file = ONTOLOGY_DIR / f"{topic}.yaml"
+    if not source_file.exists():
+        raise ValueError(f"No ontology for topic: {topic} (available: {', '.join(available_topics())})")
+
+    source = source_file.read_bytes()
+    digest = hashlib.sha1(source + f":v{INDEX_FORMAT_VERSION}".encode()).hexdigest()[:16]
+    index_file = _cache_dir(cache_dir) / f"{topic}-{digest}.pickle"
+
+    ontology = _read_index(index_file)
+    if ontology is None:
+        ontology = compile_ontology(yaml.safe_load(source))
+        ontology.digest = digest
+        _write_index(index_file, ontology)
+
+    _loaded[topic] = ontology
+    return ontology
+
+
+def compile_ontology(spec: Dict[str, Any]) -> Ontology:
+    """Build an Ontology from a parsed YAML definition."""
+    ontology = Ontology(topic=spec["topic"], version=int(spec.get("version", 1)), entity_types={})
+    for entity, entry in spec["entities"].items():
+        entry = entry or {}
+        if "type" not in entry:
+            raise ValueError(f"Ontology entity {entity!r} in {spec['topic']} has no type")
+        ontology.entity_types[entity] = entry["type"]
+        if "description" in entry:
+            ontology.descriptions[entity] = entry["description"]
+        if "visual" in entry:
+            ontology.visual_mappings[entity] = dict(entry["visual"])
+        if "related" in entry:
+            ontology.relationships[entity] = list(entry["related"])
+        if entry.get("key"):
+            ontology.key_concepts.append(entity)
+
+        ontology.matcher.add(entity)
+        for alias in entry.get("aliases", []):
+            ontology.matcher.add(entity, alias)
+    return ontology
+
+
+def clear_ontology_cache() -> None:
+    """Forget the ontologies loaded in this process (the disk index stays)."""
+    _loaded.clear()
+
+
+def _cache_dir(cache_dir: Optional[Path]) -> Path:
+    return Path(cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR).expanduser()
+
+
+def _read_index(index_file: Path) -> Optional[Ontology]:
+    try:
+        with open(index_file, "rb") as f:
+            ontology = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return ontology if isinstance(ontology, Ontology) else None
+
+
+def _write_index(index_file: Path, ontology: Ontology) -> None:
+    """Save the index atomically; a read-only cache directory only costs speed."""
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=index_file.parent, suffix=".pickle")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(ontology, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, index_file)
+    except OSError:
+        pass
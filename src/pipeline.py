@@ -1,31 +1,168 @@
 """
 Main Pipeline: Orchestrates the complete visualization generation process.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union, Callable
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import asyncio
+import copy
 import os
+import re
+import signal
 import subprocess
 import shutil
+import tempfile
+import threading
+import time
 from pathlib import Path
+import numpy as np
 
-from concept_parser import ConceptParser, parse_pca_concept
-from scene_planner import ScenePlanner, plan_pca_visualization
-from visual_mapper import VisualMapper, map_scenes_to_visuals
+from concept_parser import ConceptParser, TextSource, PARSER_VERSION, parse_pca_concept
+from ontology import available_topics, load_ontology
+from scene_planner import ScenePlanner, PLANNER_VERSION, plan_pca_visualization
+from visual_mapper import VisualMapper, MAPPER_VERSION, map_scenes_to_visuals
 from code_generator import ManimeCodeGenerator, generate_manim_code
 from ai_critic import AICritic, analyze_animation
+from render_cache import RenderCache
+from render_cost import RenderCostModel, scene_features
+from stage_cache import StageCache, normalize_text
+from fingerprint import fingerprint
+from tracer import PipelineTracer
+from render_daemon import RenderDaemonClient
+from dataset_loader import load_dataset, ReservoirSampler
+from decomposition import compute_pca_streaming, to_display_space
+from downsampling import DOWNSAMPLE_STRATEGIES, candidate_pool_size, downsample
+
+
+# Render quality presets: the flags passed to manim, the matching config
+# quality used by the render daemon, the media subdirectory they render into,
+# and the frame size and rate of the videos
+RENDER_QUALITIES = {
+    "low": {"flags": ["-ql"], "config": "low_quality", "subdir": "480p15",
+            "resolution": (854, 480), "fps": 15},
+    "medium": {"flags": ["-qm"], "config": "medium_quality", "subdir": "720p30",
+               "resolution": (1280, 720), "fps": 30},
+    "high": {"flags": ["-qh"], "config": "high_quality", "subdir": "1080p60",
+             "resolution": (1920, 1080), "fps": 60},
+    "production": {"flags": ["-qp"], "config": "production_quality", "subdir": "1440p60",
+                   "resolution": (2560, 1440), "fps": 60},
+    "fourk": {"flags": ["-qk"], "config": "fourk_quality", "subdir": "2160p60",
+              "resolution": (3840, 2160), "fps": 60},
+}
+
+
+@dataclass
+class RenderResult:
+    class_name: str
+    status: str  # "rendered", "cached", "failed", "timeout", "missing", "error"
+    video: Optional[Path]
+    message: str
+    elapsed: float
+
+
+@dataclass
+class BatchJobResult:
+    name: str
+    output_dir: str
+    success: bool  # job finished without raising
+    approved: bool  # every scene approved by the critic
+    elapsed: float
+    final_video: Optional[str]
+    error: Optional[str]
 
 
 class VisualizationPipeline:
     """Complete pipeline for generating ML concept visualizations."""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, 
+                 output_dir: str = "output", 
+                 render_workers: Optional[int] = None,
+                 use_render_cache: bool = True,
+                 render_cache_dir: Optional[str] = None,
+                 render_cache_max_mb: int = 2048,
+                 trace: bool = False,
+                 render_daemon: Optional[str] = None,
+                 render_mode: str = "per_scene",
+                 persist_scene_data: bool = False,
+                 render_quality: str = "low",
+                 final_quality: Optional[str] = None,
+                 display_points: int = 1000,
+                 downsample_strategy: str = "reservoir",
+                 projection_cache_dir: Optional[str] = None,
+                 use_stage_cache: bool = True,
+                 stage_cache_dir: Optional[str] = None,
+                 render_timings_file: Optional[str] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
+        # Opt-in Chrome trace-event timeline written as trace.json
+        self.tracer = PipelineTracer(enabled=trace)
+        
+        # Optional warm render daemon (Unix socket path) used instead of the manim CLI
+        self.render_daemon = RenderDaemonClient(render_daemon) if render_daemon else None
+        
+        # "per_scene" runs one manim process per scene class; "single_process"
+        # renders every uncached scene in one manim invocation so the generated
+        # module and its data setup are only loaded once.
+        if render_mode not in ("per_scene", "single_process"):
+            raise ValueError(f"Unknown render_mode: {render_mode}")
+        self.render_mode = render_mode
+        
+        # Output resolution; generated scenes also pick their point detail from it
+        if render_quality not in RENDER_QUALITIES:
+            raise ValueError(f"Unknown render_quality: {render_quality}")
+        self.render_quality = RENDER_QUALITIES[render_quality]
+        
+        # With a final quality, render_quality only renders drafts; approved
+        # scenes are re-rendered at this quality in the background and replace
+        # their drafts in the final video
+        if final_quality is not None and final_quality not in RENDER_QUALITIES:
+            raise ValueError(f"Unknown final_quality: {final_quality}")
+        self.final_quality = final_quality
+        
+        # Number of manim subprocesses allowed to run at once
+        self.render_workers = max(1, render_workers or os.cpu_count() or 1)
+        self.render_timeout = 120  # 2 minute timeout per scene until render times are known
+        
+        # Predicts scene render times from recorded timings, so the most expensive
+        # scenes start first and each scene gets a timeout scaled to its cost
+        self.render_cost = RenderCostModel(render_timings_file or str(self.output_dir / "render_timings.json"))
+        
+        # Rendered scenes are reused across runs and critic iterations
+        self.render_cache = None
+        if use_render_cache:
+            self.render_cache = RenderCache(
+                render_cache_dir or str(self.output_dir / "render_cache"),
+                max_bytes=render_cache_max_mb * 1024 * 1024
+            )
+        
+        # Most points a dataset visualization draws, and how they are chosen:
+        # "reservoir" (uniform), "voxel" (even coverage) or "density"
+        # (stratified by local density). The PCA still uses every row.
+        if downsample_strategy not in DOWNSAMPLE_STRATEGIES:
+            raise ValueError(f"Unknown downsample_strategy: {downsample_strategy}")
+        self.display_points = display_points
+        self.downsample_strategy = downsample_strategy
+        
+        # Parse, plan and map results are reused when their inputs repeat
+        self.stage_cache = None
+        if use_stage_cache:
+            self.stage_cache = StageCache(stage_cache_dir or str(self.output_dir / "stage_cache"))
+        
+        # Dataset decompositions are saved here and reused while the file is unchanged
+        self.projection_cache_dir = Path(projection_cache_dir or self.output_dir / "projection_cache")
+        
+        # Files in output_dir that background promotions still render from
+        # (code snapshots and dataset files), one entry per promotion; shared
+        # with the promoting copies of the pipeline
+        self.promotion_files: List[str] = []
+        self.promotion_lock = threading.Lock()
+        
         # Initialize components
         self.concept_parser = ConceptParser()
         self.scene_planner = ScenePlanner()
         self.visual_mapper = VisualMapper()
-        self.code_generator = ManimeCodeGenerator()
+        self.code_generator = ManimeCodeGenerator(persist_data=persist_scene_data)
         self.ai_critic = AICritic()
         
         # Pipeline state
@@ -34,96 +171,371 @@ class VisualizationPipeline:
         self.current_visuals = []
         self.current_code = ""
         self.current_analysis = None
+        self.current_dataset_summary: Optional[Dict[str, Any]] = None
+        
+        # Per-scene generated class text and the fingerprint it was generated from
+        self.scene_codes: List[str] = []
+        self.scene_fingerprints: List[Optional[str]] = []
     
     def generate_visualization(self, 
-                             text_input: str, 
+                             text_input: TextSource, 
                              topic: str = "pca",
-                             max_iterations: int = 3) -> Dict[str, Any]:
-        """Generate complete visualization from text input."""
+                             max_iterations: int = 3,
+                             dataset_path: Optional[str] = None,
+                             dataset_columns: Optional[Sequence[Union[int, str]]] = None,
+                             wait_for_final: bool = True) -> Dict[str, Any]:
+        """Generate complete visualization from text input.
+        
+        ``dataset_path`` (.npy, .npz or .csv) replaces the synthetic data
+        points with a sample of a real feature matrix, whose PCA drives the
+        scenes. ``dataset_columns`` selects its features by index or CSV
+        header name. ``text_input`` may also be an open text file or an
+        iterable of chunks, which is parsed without reading it all at once.
+        
+        With a ``final_quality``, the scenes render as drafts and approved
+        ones are promoted in the background. ``wait_for_final=False``
+        returns once the draft video is ready; the result's ``promotion``
+        future then resolves to the final video.
+        """
+        state = self._prepare_visualization(text_input, topic, max_iterations,
+                                            dataset_path, dataset_columns)
+        
+        # Step 7: Render all scenes
+        print("🎬 Step 7: Rendering scenes with Manim...")
+        with self.tracer.span("render", "render", scenes=len(self.current_visuals)):
+            rendered_videos = self._render_scenes(state["code_file"], topic)
+        
+        # With a final quality these are drafts; approved scenes re-render at
+        # the final quality while the drafts are joined
+        drafts = self.final_quality is not None
+        promotion = None
+        if drafts and rendered_videos:
+            promotion = self._start_promotion(state, topic, rendered_videos)
+        
+        # Step 8: Concatenate videos
+        final_video = None
+        if rendered_videos:
+            print("🎞️  Step 8: Concatenating videos into final output...")
+            with self.tracer.span("concat", "render", videos=len(rendered_videos)):
+                final_video = self._concatenate_videos(rendered_videos, topic,
+                                                       name="draft" if drafts else "final")
+            if final_video:
+                print(f"✅ {'Draft' if drafts else 'Final'} video saved to: {final_video}")
+        
+        draft_video = None
+        if drafts:
+            draft_video, final_video = final_video, None
+            if promotion is not None and wait_for_final:
+                final_video = promotion.result()
+        
+        return self._finish_visualization(state, rendered_videos, final_video, draft_video, promotion)
+    
+    async def agenerate_visualization(self, 
+                                      text_input: TextSource, 
+                                      topic: str = "pca",
+                                      max_iterations: int = 3,
+                                      dataset_path: Optional[str] = None,
+                                      dataset_columns: Optional[Sequence[Union[int, str]]] = None,
+                                      wait_for_final: bool = True) -> Dict[str, Any]:
+        """Coroutine version of generate_visualization.
+        
+        Rendering and concatenation run as asyncio subprocesses, at most
+        ``render_workers`` at a time. Cancelling the task kills the running
+        manim/ffmpeg processes and removes their partial output. Without
+        ``wait_for_final``, the result's ``promotion`` is an asyncio task.
+        """
+        # Parsing, the full-dataset PCA pass and the critic loop are CPU-bound,
+        # so they run on a worker thread instead of blocking the event loop
+        state = await asyncio.to_thread(self._prepare_visualization, text_input, topic, max_iterations,
+                                        dataset_path, dataset_columns)
+        
+        # Step 7: Render all scenes
+        print("🎬 Step 7: Rendering scenes with Manim...")
+        with self.tracer.span("render", "render", scenes=len(self.current_visuals)):
+            rendered_videos = await self._arender_scenes(state["code_file"], topic)
+        
+        # With a final quality these are drafts; approved scenes re-render at
+        # the final quality while the drafts are joined
+        drafts = self.final_quality is not None
+        promotion = None
+        if drafts and rendered_videos:
+            promotion = self._astart_promotion(state, topic, rendered_videos)
+        
+        # Step 8: Concatenate videos
+        final_video = None
+        try:
+            if rendered_videos:
+                print("🎞️  Step 8: Concatenating videos into final output...")
+                with self.tracer.span("concat", "render", videos=len(rendered_videos)):
+                    final_video = await self._aconcatenate_videos(rendered_videos, topic,
+                                                                  name="draft" if drafts else "final")
+                if final_video:
+                    print(f"✅ {'Draft' if drafts else 'Final'} video saved to: {final_video}")
+            
+            draft_video = None
+            if drafts:
+                draft_video, final_video = final_video, None
+                if promotion is not None and wait_for_final:
+                    final_video = await promotion
+        except asyncio.CancelledError:
+            if promotion is not None:
+                promotion.cancel()
+            raise
+        
+        return self._finish_visualization(state, rendered_videos, final_video, draft_video, promotion)
+    
+    def _prepare_visualization(self, 
+                               text_input: TextSource, 
+                               topic: str, 
+                               max_iterations: int,
+                               dataset_path: Optional[str] = None,
+                               dataset_columns: Optional[Sequence[Union[int, str]]] = None) -> Dict[str, Any]:
+        """Run steps 1-6: parse, plan, map, generate code, critique and report."""
         print(f"🚀 Starting visualization pipeline for: {topic}")
+        self.tracer.reset()
+        
+        # Optional real dataset shown instead of the synthetic points
+        self._load_dataset(dataset_path, dataset_columns, topic)
         
         # Step 1: Parse concepts
         print("📝 Step 1: Parsing concepts...")
-        self.current_concepts = self.concept_parser.parse_text(text_input)
-        print(f"   Found {len(self.current_concepts)} concepts")
+        vocabulary = topic.lower()
+        if vocabulary not in available_topics():
+            vocabulary = self.concept_parser.topic
+            print(f"   ⚠️  No ontology for topic '{topic}'; using the {vocabulary} vocabulary")
+        parse_inputs = None
+        if isinstance(text_input, str):
+            # Streamed input would have to be read twice to be hashed
+            parse_inputs = (PARSER_VERSION, normalize_text(text_input), vocabulary,
+                            load_ontology(vocabulary).digest, self.concept_parser.cooccurrence_window)
+        with self.tracer.span("parse", topic=vocabulary, streamed=parse_inputs is None) as span_args:
+            self.current_concepts, span_args["cached"] = self._run_stage(
+                "parse", parse_inputs,
+                lambda: self.concept_parser.parse_stream(text_input, vocabulary))
+        print(f"   Found {len(self.current_concepts)} concepts{' (cached)' if span_args['cached'] else ''}")
         
         # Step 2: Plan scenes
         print("🎬 Step 2: Planning scenes...")
-        self.current_scenes = self.scene_planner.plan_scenes(self.current_concepts, topic)
-        print(f"   Planned {len(self.current_scenes)} scenes")
+        with self.tracer.span("plan", topic=topic) as span_args:
+            self.current_scenes, span_args["cached"] = self._run_stage(
+                "plan", (PLANNER_VERSION, self.current_concepts, topic),
+                lambda: self.scene_planner.plan_scenes(self.current_concepts, topic))
+        print(f"   Planned {len(self.current_scenes)} scenes{' (cached)' if span_args['cached'] else ''}")
         
         # Step 3: Map to visuals
         print("🎨 Step 3: Mapping to visual elements...")
-        self.current_visuals = self.visual_mapper.map_scenes_to_visuals(self.current_scenes)
-        print(f"   Created visual mappings for {len(self.current_visuals)} scenes")
+        with self.tracer.span("map", scenes=len(self.current_scenes)) as span_args:
+            self.current_visuals, span_args["cached"] = self._run_stage(
+                "map", (MAPPER_VERSION, self.current_scenes, self.visual_mapper.cache_inputs()),
+                lambda: self.visual_mapper.map_scenes_to_visuals(self.current_scenes))
+        print(f"   Created visual mappings for {len(self.current_visuals)} scenes"
+              f"{' (cached)' if span_args['cached'] else ''}")
         
         # Step 4: Generate code
         print("💻 Step 4: Generating Manim code...")
         output_file = self.output_dir / f"{topic}_visualization.py"
-        self.current_code = self.code_generator.generate_complete_file(
-            self.current_visuals, 
-            str(output_file)
-        )
+        with self.tracer.span("codegen", file=output_file.name):
+            self.scene_codes = [""] * len(self.current_visuals)
+            self.scene_fingerprints = [None] * len(self.current_visuals)
+            self._regenerate_scene_codes(range(len(self.current_visuals)))
+            self.current_code = self.code_generator.generate_complete_file(
+                self.current_visuals, 
+                str(output_file),
+                scene_codes=self.scene_codes
+            )
         print(f"   Generated code saved to: {output_file}")
         
         # Step 5: AI Critic analysis and iteration
         print("🤖 Step 5: AI Critic analysis...")
         iteration = 0
+        scene_analyses: List[Any] = [None] * len(self.current_visuals)
+        dirty = set(range(len(self.current_visuals)))
         
         while iteration < max_iterations:
-            # Analyze each scene
-            scene_analyses = []
-            for i, scene_visual in enumerate(self.current_visuals):
-                analysis = self.ai_critic.analyze_animation(
-                    scene_visual, 
-                    self.current_code, 
-                    topic
-                )
-                scene_analyses.append(analysis)
+            with self.tracer.span(f"critic iteration {iteration + 1}", "critic") as span_args:
+                span_args["analyzed"] = len(dirty)
                 
-                print(f"   Scene {i+1} ({scene_visual['name']}): {analysis.overall_score:.1f}/10 - {analysis.approval_status}")
+                # Only re-analyze scenes whose code changed since their last analysis;
+                # approved scenes are frozen and never revisited.
+                for i in sorted(dirty):
+                    scene_visual = self.current_visuals[i]
+                    analysis = self.ai_critic.analyze_animation(
+                        scene_visual, 
+                        self.scene_codes[i], 
+                        topic
+                    )
+                    scene_analyses[i] = analysis
+                    
+                    print(f"   Scene {i+1} ({scene_visual['name']}): {analysis.overall_score:.1f}/10 - {analysis.approval_status}")
+                
+                # Check if all scenes are approved
+                all_approved = all(analysis.approval_status == "approved" for analysis in scene_analyses)
+                
+                if all_approved:
+                    print("✅ All scenes approved!")
+                    break
+                
+                # Apply improvements
+                print(f"🔧 Iteration {iteration + 1}: Applying improvements...")
+                dirty = self._apply_improvements(scene_analyses)
+                span_args["changed"] = len(dirty)
+                
+                if not dirty:
+                    print("   No scene changed; stopping early")
+                    break
+                
+                # Regenerate code, re-emitting only the scenes that changed
+                with self.tracer.span("codegen", changed=len(dirty)):
+                    self._regenerate_scene_codes(dirty)
+                    print(f"   Regenerated {len(dirty)}/{len(self.current_visuals)} scenes")
+                    output_file = self.output_dir / f"{topic}_visualization_v{iteration + 2}.py"
+                    self.current_code = self.code_generator.generate_complete_file(
+                        self.current_visuals,
+                        str(output_file),
+                        scene_codes=self.scene_codes
+                    )
             
-            # Check if all scenes are approved
-            all_approved = all(analysis.approval_status == "approved" for analysis in scene_analyses)
+            iteration += 1
+        
+        # Step 6: Generate final report
+        print("📊 Step 6: Generating final report...")
+        with self.tracer.span("report"):
+            report = self._generate_final_report(scene_analyses, topic)
+            report_file = self.output_dir / f"{topic}_analysis_report.md"
             
-            if all_approved:
-                print("✅ All scenes approved!")
-                break
+            with open(report_file, 'w') as f:
+                f.write(report)
+        
+        print(f"📋 Analysis report saved to: {report_file}")
+        
+        return {
+            "code_file": output_file,
+            "report_file": report_file,
+            "analyses": scene_analyses,
+            "approved": all_approved
+        }
+    
+    def _run_stage(self, stage: str, inputs: Optional[Tuple[Any, ...]], compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run one stage, or reuse its result for the same inputs.
+        
+        ``inputs`` starts with the stage's version; None skips the cache.
+        Returns the result and whether it came from the cache.
+        """
+        if self.stage_cache is None or inputs is None:
+            return compute(), False
+        key = self.stage_cache.make_key(stage, *inputs)
+        cached = self.stage_cache.get(stage, key)
+        if cached is not None:
+            return cached, True
+        result = compute()
+        self.stage_cache.put(stage, key, result)
+        return result, False
+    
+    def _load_dataset(self, 
+                      dataset_path: Optional[str], 
+                      dataset_columns: Optional[Sequence[Union[int, str]]], 
+                      topic: str) -> None:
+        """Fit PCA on a dataset and hand a display sample to the mapper and generator."""
+        if dataset_path is None:
+            self.visual_mapper.set_dataset(None)
+            self.code_generator.data_file = None
+            self.current_dataset_summary = None
+            return
+        
+        dataset = load_dataset(dataset_path, dataset_columns)
+        if dataset.n_features < 2:
+            raise ValueError("A dataset needs at least two feature columns to visualize PCA")
+        print(f"📂 Loading dataset: {dataset.path} ({dataset.n_rows:,} rows x {dataset.n_features} features)")
+        
+        with self.tracer.span("dataset", rows=dataset.n_rows, features=dataset.n_features):
+            # The first pass feeds both the PCA statistics and a uniform
+            # candidate pool; wide data needs further passes for the PCA alone
+            pool_size = candidate_pool_size(self.display_points, self.downsample_strategy, dataset.n_features)
+            sampler = ReservoirSampler(pool_size, dataset.n_features)
+            passes = 0
             
-            # Apply improvements
-            print(f"🔧 Iteration {iteration + 1}: Applying improvements...")
-            self._apply_improvements(scene_analyses)
+            def dataset_chunks():
+                nonlocal passes
+                passes += 1
+                for chunk in dataset.iter_chunks():
+                    if passes == 1:
+                        sampler.update(chunk)
+                    yield chunk
             
-            # Regenerate code
-            output_file = self.output_dir / f"{topic}_visualization_v{iteration + 2}.py"
-            self.current_code = self.code_generator.generate_complete_file(
-                self.current_visuals,
-                str(output_file)
-            )
+            pca = compute_pca_streaming(dataset_chunks, cache_key=dataset.identity,
+                                        cache_dir=self.projection_cache_dir)
+            if sampler.seen == 0:
+                # The PCA came from a cache without reading the rows
+                for chunk in dataset.iter_chunks():
+                    sampler.update(chunk)
+            points, display_pca = to_display_space(pca, sampler.sample)
             
-            iteration += 1
+            # Every scene of the run draws this one subset
+            points = points[downsample(points, self.display_points, self.downsample_strategy)]
         
-        # Step 6: Generate final report
-        print("📊 Step 6: Generating final report...")
-        report = self._generate_final_report(scene_analyses, topic)
-        report_file = self.output_dir / f"{topic}_analysis_report.md"
+        ratios = ", ".join(f"{r:.1%}" for r in pca.explained_variance_ratio[:3])
+        print(f"   PCA over {pca.n_samples:,} rows ({pca.method}); top components explain {ratios}")
+        print(f"   Showing {len(points):,} points ({self.downsample_strategy} downsampling)")
         
-        with open(report_file, 'w') as f:
-            f.write(report)
+        # Generated code loads the same sample; the name changes with the data
+        # so cached renders of other data are never reused
+        digest = fingerprint((points, display_pca.components, display_pca.explained_variance))[:12]
+        data_file = f"{topic}_visualization_data_{digest}.npz"
+        data_path = self.output_dir / data_file
+        if not data_path.exists():
+            # Written atomically and never rewritten, since a background
+            # promotion of an earlier run may be loading it
+            fd, tmp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, data_3d=points, components=display_pca.components,
+                         explained_variance=display_pca.explained_variance)
+            os.replace(tmp_name, data_path)
         
-        print(f"📋 Analysis report saved to: {report_file}")
+        # Earlier data for this topic is not loaded again, unless a
+        # background promotion is still rendering from it
+        with self.promotion_lock:
+            for stale in self.output_dir.glob(f"{topic}_visualization_data_{'?' * 12}.npz"):
+                if stale.name != data_file and stale.name not in self.promotion_files:
+                    stale.unlink(missing_ok=True)
         
-        # Step 7: Render all scenes
-        print("🎬 Step 7: Rendering scenes with Manim...")
-        rendered_videos = self._render_scenes(output_file, topic)
+        # Scenes and the report show the scree of every computed component
+        self.current_dataset_summary = {
+            "path": str(dataset.path),
+            "rows": dataset.n_rows,
+            "features": dataset.n_features,
+            "method": pca.method,
+            "explained_variance_ratio": [float(r) for r in pca.explained_variance_ratio],
+            "remaining_variance_ratio": pca.remaining_variance_ratio()
+        }
+        self.visual_mapper.set_dataset(points, display_pca, scree=pca.explained_variance_ratio)
+        self.code_generator.data_file = data_file
+    
+    def _finish_visualization(self, 
+                              state: Dict[str, Any], 
+                              rendered_videos: List[Path], 
+                              final_video: Optional[Path],
+                              draft_video: Optional[Path] = None,
+                              promotion: Optional[Union[Future, "asyncio.Task"]] = None) -> Dict[str, Any]:
+        """Write the trace and assemble the result dict."""
+        # Spans of a finished promotion join this run's timeline
+        promotion_merged = promotion is None or promotion.done()
+        if promotion is not None and promotion_merged:
+            self.tracer.merge(state["promotion_trace"])
         
-        # Step 8: Concatenate videos
-        final_video = None
-        if rendered_videos:
-            print("🎞️  Step 8: Concatenating videos into final output...")
-            final_video = self._concatenate_videos(rendered_videos, topic)
-            if final_video:
-                print(f"✅ Final video saved to: {final_video}")
+        # Write the timeline next to the report when tracing is enabled
+        trace_file = self.tracer.write(self.output_dir / "trace.json")
+        if trace_file:
+            print(f"⏱️  Trace saved to: {trace_file}")
+        
+        if trace_file and not promotion_merged:
+            # Rewrite the trace with the promotion spans once it finishes
+            run_trace = self.tracer.copy()
+            
+            def write_promotion_trace(_):
+                run_trace.merge(state["promotion_trace"])
+                run_trace.write(trace_file)
+            
+            promotion.add_done_callback(write_promotion_trace)
         
         # Return results
         result = {
@@ -131,21 +543,29 @@ class VisualizationPipeline:
             "scenes": self.current_scenes,
             "visuals": self.current_visuals,
             "code": self.current_code,
-            "analyses": scene_analyses,
+            "analyses": state["analyses"],
             "output_files": {
-                "code": str(output_file),
-                "report": str(report_file),
+                "code": str(state["code_file"]),
+                "report": str(state["report_file"]),
                 "final_video": str(final_video) if final_video else None,
-                "scene_videos": [str(v) for v in rendered_videos] if rendered_videos else []
+                "draft_video": str(draft_video) if draft_video else None,
+                "scene_videos": [str(v) for v in rendered_videos] if rendered_videos else [],
+                "trace": str(trace_file) if trace_file else None
             },
-            "pipeline_success": all_approved
+            "pipeline_success": state["approved"],
+            # Resolves to the final video when it was not waited for
+            "promotion": promotion
         }
         
         print("🎉 Pipeline completed!")
         return result
     
-    def _apply_improvements(self, analyses: List[Any]) -> None:
-        """Apply improvements based on AI critic feedback."""
+    def _apply_improvements(self, analyses: List[Any]) -> set:
+        """Apply improvements based on AI critic feedback.
+        
+        Returns the indices of scenes whose content actually changed.
+        """
+        changed = set()
         for i, analysis in enumerate(analyses):
             if analysis.approval_status != "approved":
                 scene_visual = self.current_visuals[i]
@@ -162,6 +582,18 @@ class VisualizationPipeline:
                 # Apply educational enhancements
                 if recommendations.get("educational_enhancements"):
                     self._enhance_education(scene_visual, recommendations["educational_enhancements"])
+                
+                if fingerprint(scene_visual) != self.scene_fingerprints[i]:
+                    changed.add(i)
+        
+        return changed
+    
+    def _regenerate_scene_codes(self, indices) -> None:
+        """Re-emit the generated class text for the given scenes."""
+        for i in indices:
+            scene_visual = self.current_visuals[i]
+            self.scene_codes[i] = self.code_generator.generate_scene_class(scene_visual)
+            self.scene_fingerprints[i] = fingerprint(scene_visual)
     
     def _adjust_timing(self, scene_visual: Dict[str, Any], adjustments: List[str]) -> None:
         """Apply timing adjustments to a scene."""
@@ -210,11 +642,20 @@ class VisualizationPipeline:
         report += f"- **Average Score:** {avg_score:.1f}/10\n"
         report += f"- **Overall Status:** {'✅ APPROVED' if approved_scenes == total_scenes else '⚠️ NEEDS REVISION'}\n\n"
         
+        if self.current_dataset_summary:
+            report += self._dataset_report(self.current_dataset_summary)
+        
         # Individual scene reports
         report += f"## Scene Analysis\n\n"
+        scene_classes = self._scene_class_names()
         for i, analysis in enumerate(analyses):
             scene_name = self.current_visuals[i]["name"]
             report += f"### Scene {i+1}: {scene_name}\n"
+            timing = self.code_generator.scene_timings.get(scene_classes[i])
+            if timing:
+                report += (f"**Timeline:** {timing['total']:.1f}s total "
+                           f"(planned {timing['planned']:.1f}s; animations {timing['animations']:.1f}s, "
+                           f"camera {timing['camera']:.1f}s)\n\n")
             report += self.ai_critic.generate_improvement_report(analysis)
             report += "\n---\n\n"
         
@@ -241,104 +682,709 @@ class VisualizationPipeline:
         
         return report
     
-    def _render_scenes(self, code_file: Path, topic: str) -> List[Path]:
-        """Render all scenes using Manim."""
-        rendered_videos = []
+    def _dataset_report(self, summary: Dict[str, Any]) -> str:
+        """Dataset section of the report, with the scree of every computed component."""
+        report = f"## Dataset\n\n"
+        report += f"- **File:** `{summary['path']}`\n"
+        report += f"- **Shape:** {summary['rows']:,} rows x {summary['features']} features\n"
+        report += f"- **Decomposition:** {summary['method']}\n\n"
+        report += "| Component | Explained variance | Cumulative |\n"
+        report += "|-----------|--------------------|------------|\n"
+        cumulative = 0.0
+        for i, ratio in enumerate(summary["explained_variance_ratio"]):
+            cumulative += ratio
+            report += f"| PC{i+1} | {ratio:.2%} | {cumulative:.2%} |\n"
+        if summary["remaining_variance_ratio"] > 0.0005:
+            report += f"| Remaining | {summary['remaining_variance_ratio']:.2%} | 100.00% |\n"
+        return report + "\n"
+    
+    def _render_scenes(self, code_file: Path, topic: str, scenes: Optional[Sequence[int]] = None) -> List[Path]:
+        """Render all scenes (or the ``scenes`` indices) using Manim, running scene subprocesses concurrently."""
+        daemon, manim_version = self._connect_render_daemon()
+        if daemon is None:
+            # Check if manim is available
+            try:
+                version = subprocess.run(["manim", "--version"], capture_output=True, text=True, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                print("   ⚠️  Manim not found. Skipping rendering.")
+                print("   Install with: pip install manim")
+                return []
+            manim_version = version.stdout.strip()
         
-        # Check if manim is available
-        try:
-            subprocess.run(["manim", "--version"], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print("   ⚠️  Manim not found. Skipping rendering.")
-            print("   Install with: pip install manim")
+        scene_classes = self._scene_class_names()
+        if not scene_classes:
             return []
         
-        # Get all scene class names
+        # Restore unchanged scenes from the render cache
+        selected = range(len(scene_classes)) if scenes is None else scenes
+        results, cache_keys = self._restore_cached_renders(code_file, scene_classes, manim_version, selected)
+        
+        pending = [i for i in selected if results[i] is None]
+        pending, features, timeouts = self._plan_renders(pending, daemon)
+        if pending and daemon is None and self.render_mode == "single_process":
+            print(f"   Rendering {len(pending)} scenes in a single manim process...")
+            pending_classes = [scene_classes[i] for i in pending]
+            with self.tracer.span(f"manim ({len(pending)} scenes)", "subprocess",
+                                  scenes=pending_classes) as span_args:
+                outcomes = self._run_manim_single_process(code_file, pending_classes,
+                                                          sum(timeouts.values()))
+                span_args["rendered"] = sum(1 for r in outcomes if r.video is not None)
+            for i, outcome in zip(pending, outcomes):
+                results[i] = outcome
+                self._record_render_result(i, results, cache_keys)
+        elif pending:
+            workers = min(self.render_workers, len(pending))
+            print(f"   Rendering {len(pending)} scenes with {workers} worker(s), most expensive first...")
+            
+            # Each worker only waits on its manim subprocess, so threads are enough
+            # to keep that many renders running in parallel. The executor starts
+            # jobs in submission order, which is longest predicted first.
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as executor:
+                futures = {
+                    executor.submit(self._render_scene, code_file, scene_classes[i], daemon, timeouts[i]): i
+                    for i in pending
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    self._record_render_result(i, results, cache_keys, features[i])
+        
+        return self._collect_rendered_videos(results, pending)
+    
+    async def _arender_scenes(self, code_file: Path, topic: str, scenes: Optional[Sequence[int]] = None) -> List[Path]:
+        """Render all scenes (or the ``scenes`` indices) as asyncio subprocesses, limited by a semaphore.
+        
+        The daemon ping, render cache copies and timing saves run on worker
+        threads so they do not block the event loop.
+        """
+        daemon, manim_version = await asyncio.to_thread(self._connect_render_daemon)
+        if daemon is None:
+            # Check if manim is available
+            try:
+                returncode, stdout, _ = await self._run_async_subprocess(["manim", "--version"], timeout=30)
+            except FileNotFoundError:
+                returncode = 1
+            if returncode != 0:
+                print("   ⚠️  Manim not found. Skipping rendering.")
+                print("   Install with: pip install manim")
+                return []
+            manim_version = stdout.strip()
+        
+        scene_classes = self._scene_class_names()
+        if not scene_classes:
+            return []
+        
+        # Restore unchanged scenes from the render cache
+        selected = range(len(scene_classes)) if scenes is None else scenes
+        results, cache_keys = await asyncio.to_thread(self._restore_cached_renders, code_file,
+                                                      scene_classes, manim_version, selected)
+        
+        pending = [i for i in selected if results[i] is None]
+        pending, features, timeouts = self._plan_renders(pending, daemon)
+        if pending and daemon is None and self.render_mode == "single_process":
+            print(f"   Rendering {len(pending)} scenes in a single manim process...")
+            pending_classes = [scene_classes[i] for i in pending]
+            timeout = sum(timeouts.values())
+            start = time.perf_counter()
+            self._clear_stale_videos(code_file, pending_classes)
+            try:
+                returncode, _, stderr = await self._run_async_subprocess(
+                    self._manim_command(code_file, *pending_classes),
+                    timeout=timeout
+                )
+                timed_out = False
+            except asyncio.TimeoutError:
+                returncode, stderr, timed_out = None, "", True
+            except asyncio.CancelledError:
+                for class_name in pending_classes:
+                    self._remove_partial_media(code_file, class_name)
+                raise
+            outcomes = self._single_process_outcomes(code_file, pending_classes, returncode,
+                                                     stderr, start, timed_out, timeout)
+            self.tracer.add_span(f"manim ({len(pending)} scenes)", start, time.perf_counter(),
+                                 "subprocess", scenes=pending_classes)
+            for i, outcome in zip(pending, outcomes):
+                results[i] = outcome
+                await asyncio.to_thread(self._record_render_result, i, results, cache_keys)
+        elif pending:
+            workers = min(self.render_workers, len(pending))
+            print(f"   Rendering {len(pending)} scenes with {workers} worker(s), most expensive first...")
+            semaphore = asyncio.Semaphore(workers)
+            
+            async def render(i: int):
+                async with semaphore:
+                    return i, await self._arender_scene(code_file, scene_classes[i], daemon, timeouts[i])
+            
+            # The semaphore admits waiters in order, which is longest predicted first
+            tasks = [asyncio.ensure_future(render(i)) for i in pending]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, results[i] = await next_done
+                    await asyncio.to_thread(self._record_render_result, i, results, cache_keys, features[i])
+            finally:
+                # On cancellation, stop the renders that are still queued or running
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return await asyncio.to_thread(self._collect_rendered_videos, results, pending)
+    
+    def _start_promotion(self, state: Dict[str, Any], topic: str, draft_videos: List[Path]) -> Optional[Future]:
+        """Promote the approved scenes on a background thread; None when none was approved."""
+        plan = self._promotion_plan(state)
+        if plan is None:
+            return None
+        promoter, code_file, approved = plan
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="promote")
+        future = executor.submit(promoter._promote, code_file, topic, approved, draft_videos)
+        # The thread finishes the promotion; nothing else is queued on it
+        executor.shutdown(wait=False)
+        return future
+    
+    def _astart_promotion(self, state: Dict[str, Any], topic: str, draft_videos: List[Path]) -> Optional["asyncio.Task"]:
+        """Promote the approved scenes in a background asyncio task; None when none was approved."""
+        plan = self._promotion_plan(state)
+        if plan is None:
+            return None
+        promoter, code_file, approved = plan
+        return asyncio.ensure_future(promoter._apromote(code_file, topic, approved, draft_videos))
+    
+    def _promotion_plan(self, state: Dict[str, Any]) -> Optional[Tuple["VisualizationPipeline", Path, List[int]]]:
+        """A final-quality copy of this pipeline, the code it renders and the approved scene indices.
+        
+        The copy renders a snapshot of the generated code and holds its own
+        scene lists, timings, render cost model and tracer, so starting the next run does not
+        change what the background promotion renders or records. Its spans
+        are stored in ``state["promotion_trace"]``.
+        """
+        approved = [i for i, analysis in enumerate(state["analyses"])
+                    if analysis is not None and analysis.approval_status == "approved"]
+        if not approved:
+            print("   No scene approved; nothing to promote to the final quality")
+            return None
+        print(f"⏫ Promoting {len(approved)}/{len(self.current_visuals)} approved scenes "
+              f"to {self.final_quality} quality in the background...")
+        
+        # Named by content, so a rerun of the same code reuses the file and its
+        # media directory; the dataset .npz it loads is content-named as well.
+        # Both are registered before the snapshot is written so an earlier
+        # promotion of the same code ending now does not delete them.
+        code_file = state["code_file"]
+        snapshot = code_file.with_name(f"{code_file.stem}_final_{fingerprint(self.current_code)[:12]}.py")
+        with self.promotion_lock:
+            self.promotion_files.append(snapshot.name)
+            if self.code_generator.data_file:
+                self.promotion_files.append(self.code_generator.data_file)
+            if not snapshot.exists():
+                fd, tmp_name = tempfile.mkstemp(dir=snapshot.parent, suffix=".py")
+                with os.fdopen(fd, "w") as f:
+                    f.write(self.current_code)
+                os.replace(tmp_name, snapshot)
+        
+        promoter = copy.copy(self)
+        promoter.render_quality = RENDER_QUALITIES[self.final_quality]
+        promoter.final_quality = None
+        promoter.current_visuals = list(self.current_visuals)
+        promoter.scene_codes = list(self.scene_codes)
+        promoter.code_generator = copy.copy(self.code_generator)
+        promoter.code_generator.scene_timings = dict(self.code_generator.scene_timings)
+        promoter.tracer = self.tracer.fork()
+        # Its own cost model, so timings recorded on both threads reach the
+        # shared timings file through the locked merge in save()
+        promoter.render_cost = RenderCostModel(str(self.render_cost.timings_file))
+        state["promotion_trace"] = promoter.tracer
+        return promoter, snapshot, approved
+    
+    def _promote(self, code_file: Path, topic: str, approved: List[int], draft_videos: List[Path]) -> Optional[Path]:
+        """Render the approved scenes at this (final) quality and join them with the other drafts."""
+        try:
+            with self.tracer.span("promote", "render", scenes=len(approved)):
+                promoted = self._render_scenes(code_file, topic, scenes=approved) if approved else []
+            videos, scale_to = self._ladder_videos(draft_videos, promoted)
+            with self.tracer.span("concat", "render", videos=len(videos), promoted=len(promoted)):
+                final_video = self._concatenate_videos(videos, topic, scale_to=scale_to)
+        finally:
+            self._end_promotion(code_file)
+        self._report_promotion(final_video, promoted, videos)
+        return final_video
+    
+    async def _apromote(self, code_file: Path, topic: str, approved: List[int], draft_videos: List[Path]) -> Optional[Path]:
+        """Coroutine version of _promote."""
+        try:
+            with self.tracer.span("promote", "render", scenes=len(approved)):
+                promoted = await self._arender_scenes(code_file, topic, scenes=approved) if approved else []
+            videos, scale_to = self._ladder_videos(draft_videos, promoted)
+            with self.tracer.span("concat", "render", videos=len(videos), promoted=len(promoted)):
+                final_video = await self._aconcatenate_videos(videos, topic, scale_to=scale_to)
+        finally:
+            self._end_promotion(code_file)
+        self._report_promotion(final_video, promoted, videos)
+        return final_video
+    
+    def _end_promotion(self, code_file: Path) -> None:
+        """Release what this finished or failed promotion rendered from, deleting its unused snapshot."""
+        with self.promotion_lock:
+            self.promotion_files.remove(code_file.name)
+            if self.code_generator.data_file:
+                self.promotion_files.remove(self.code_generator.data_file)
+            if code_file.name not in self.promotion_files:
+                code_file.unlink(missing_ok=True)
+    
+    def _ladder_videos(self, 
+                       draft_videos: List[Path], 
+                       promoted_videos: List[Path]) -> Tuple[List[Path], Optional[Dict[str, Any]]]:
+        """Scene videos for the final cut: the promoted render where there is one, else the draft.
+        
+        Also returns the quality to re-encode to when drafts and promoted
+        renders are mixed, or None when a stream copy will do.
+        """
+        drafts = {video.stem: video for video in draft_videos}
+        promoted = {video.stem: video for video in promoted_videos}
+        videos = []
+        for class_name in self._scene_class_names():
+            video = promoted.get(class_name) or drafts.get(class_name)
+            if video is not None:
+                videos.append(video)
+        
+        mixed = 0 < len(promoted) < len(videos)
+        return videos, self.render_quality if mixed else None
+    
+    def _report_promotion(self, final_video: Optional[Path], promoted: List[Path], videos: List[Path]) -> None:
+        if final_video:
+            print(f"✅ Final video ({len(promoted)}/{len(videos)} scenes promoted) saved to: {final_video}")
+        else:
+            print("   ⚠️  Final video could not be assembled; the draft video is still available")
+    
+    def _connect_render_daemon(self) -> Tuple[Optional[RenderDaemonClient], Optional[str]]:
+        """Return the render daemon client and its manim version if it is reachable."""
+        if self.render_daemon is None:
+            return None, None
+        
+        info = self.render_daemon.ping()
+        if info is None:
+            print(f"   ⚠️  Render daemon not reachable at {self.render_daemon.socket_path}; using manim CLI")
+            return None, None
+        
+        print(f"   🔥 Using warm render daemon ({info['workers']} workers)")
+        return self.render_daemon, info["manim_version"]
+    
+    def _scene_class_names(self) -> List[str]:
+        """Get all scene class names, in scene order."""
         scene_classes = []
         for scene_visual in self.current_visuals:
             class_name = ''.join(word.capitalize() for word in scene_visual["name"].split('_'))
             scene_classes.append(class_name)
+        return scene_classes
+    
+    def _restore_cached_renders(self, 
+                                code_file: Path, 
+                                scene_classes: List[str], 
+                                manim_version: str,
+                                selected: Sequence[int]) -> Tuple[List[Optional[RenderResult]], List[Optional[str]]]:
+        """Look the selected scenes up in the render cache, restoring hits into the media dir."""
+        results: List[Optional[RenderResult]] = [None] * len(scene_classes)
+        cache_keys: List[Optional[str]] = [None] * len(scene_classes)
+        if self.render_cache is None:
+            return results, cache_keys
         
-        # Render each scene
-        for i, class_name in enumerate(scene_classes):
-            print(f"   Rendering scene {i+1}/{len(scene_classes)}: {class_name}...")
+        for i in selected:
+            cache_keys[i] = self.render_cache.make_key(
+                self.scene_codes[i],
+                self.code_generator.generate_header(self.scene_codes[i]),
+                manim_version,
+                self.render_quality["flags"]
+            )
+            destination = self._video_dir(code_file) / f"{scene_classes[i]}.mp4"
+            video = self.render_cache.restore(cache_keys[i], destination)
+            if video is not None:
+                results[i] = RenderResult(scene_classes[i], "cached", video, video.name, 0.0)
+                self._report_render_result(i, len(scene_classes), results[i])
+        
+        return results, cache_keys
+    
+    def _plan_renders(self, 
+                      pending: List[int], 
+                      daemon: Optional[RenderDaemonClient]) -> Tuple[List[int], Dict[int, Dict[str, float]], Dict[int, float]]:
+        """Order pending scenes longest predicted render first and pick their timeouts.
+        
+        Starting the expensive scenes first keeps one long render from
+        being left to run alone at the end.
+        """
+        scene_classes = self._scene_class_names()
+        features = {}
+        for i in pending:
+            timing = self.code_generator.scene_timings.get(scene_classes[i])
+            duration = timing["total"] if timing else self.current_visuals[i]["duration"]
+            features[i] = scene_features(self.current_visuals[i], duration,
+                                         self.render_quality["subdir"], daemon=daemon is not None)
+        
+        predicted = {i: self.render_cost.predict(features[i]) for i in pending}
+        timeouts = {i: self.render_cost.timeout_for(features[i], self.render_timeout) for i in pending}
+        return sorted(pending, key=lambda i: predicted[i], reverse=True), features, timeouts
+    
+    def _record_render_result(self, 
+                              index: int, 
+                              results: List[Optional[RenderResult]], 
+                              cache_keys: List[Optional[str]],
+                              features: Optional[Dict[str, float]] = None) -> None:
+        """Report a finished render, store it in the render cache and time it."""
+        result = results[index]
+        self._report_render_result(index, len(results), result)
+        if result.video is not None and cache_keys[index] is not None:
+            self.render_cache.put(cache_keys[index], result.video)
+        if result.status == "rendered" and features is not None:
+            self.render_cost.record(features, result.elapsed)
+    
+    def _collect_rendered_videos(self, 
+                                 results: List[Optional[RenderResult]], 
+                                 pending: List[int]) -> List[Path]:
+        """Return rendered videos in scene order so concatenation is deterministic."""
+        if pending:
+            self.render_cost.fit()
+            self.render_cost.save()
+        if self.render_cache is not None:
+            hits = sum(1 for result in results if result is not None and result.status == "cached")
+            print(f"   Render cache: {hits} hit(s), {len(pending)} miss(es)")
+        return [result.video for result in results if result is not None and result.video is not None]
+    
+    def _render_scene(self, 
+                      code_file: Path, 
+                      class_name: str, 
+                      daemon: Optional[RenderDaemonClient] = None,
+                      timeout: Optional[float] = None) -> RenderResult:
+        """Render a single scene class in its own manim subprocess or on the daemon."""
+        timeout = timeout or self.render_timeout
+        with self.tracer.span(f"manim {class_name}", "subprocess", scene=class_name,
+                              backend="daemon" if daemon else "cli", timeout=timeout) as span_args:
+            if daemon is not None:
+                result = self._run_on_daemon(daemon, code_file, class_name, timeout)
+            else:
+                result = self._run_manim(code_file, class_name, timeout)
+            span_args["status"] = result.status
+        return result
+    
+    def _run_on_daemon(self, 
+                       daemon: RenderDaemonClient, 
+                       code_file: Path, 
+                       class_name: str,
+                       timeout: float) -> RenderResult:
+        """Send one scene to the warm render daemon."""
+        start = time.perf_counter()
+        try:
+            response = daemon.render(code_file, class_name, self.output_dir / "media",
+                                     self.render_quality["config"], timeout)
+        except Exception as e:
+            return RenderResult(class_name, "error", None, f"Render daemon: {e}",
+                                time.perf_counter() - start)
+        return self._daemon_outcome(code_file, class_name, response, time.perf_counter() - start)
+    
+    def _daemon_outcome(self, 
+                        code_file: Path, 
+                        class_name: str, 
+                        response: Dict[str, Any], 
+                        elapsed: float) -> RenderResult:
+        """Turn a render daemon response into a RenderResult."""
+        status = response.get("status")
+        if status == "rendered":
+            video = Path(response["video"])
+            if video.exists():
+                return RenderResult(class_name, "rendered", video, video.name, elapsed)
+            return RenderResult(class_name, "missing", None,
+                                f"Video file not found for {class_name}", elapsed)
+        if status == "timeout":
+            # The daemon killed the job; drop whatever it wrote before that
+            self._remove_partial_media(code_file, class_name)
+            return RenderResult(class_name, "timeout", None, response.get("error", "Timeout"), elapsed)
+        
+        # Keep the last traceback line, which names the actual exception
+        error = (response.get("error") or "Rendering failed").strip().splitlines()[-1]
+        return RenderResult(class_name, "failed", None, f"Rendering failed: {error}", elapsed)
+    
+    def _run_manim(self, code_file: Path, class_name: str, timeout: float) -> RenderResult:
+        """Run manim for one scene class and locate its output."""
+        start = time.perf_counter()
+        try:
+            # Run manim render command
+            result = subprocess.run(
+                self._manim_command(code_file, class_name),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            self._remove_partial_media(code_file, class_name)
+            return RenderResult(class_name, "timeout", None,
+                                f"Timeout after {timeout:.0f}s",
+                                time.perf_counter() - start)
+        except Exception as e:
+            return RenderResult(class_name, "error", None, str(e),
+                                time.perf_counter() - start)
+        
+        return self._render_outcome(code_file, class_name, result.returncode, result.stderr,
+                                    time.perf_counter() - start)
+    
+    async def _arender_scene(self, 
+                             code_file: Path, 
+                             class_name: str, 
+                             daemon: Optional[RenderDaemonClient] = None,
+                             timeout: Optional[float] = None) -> RenderResult:
+        """Render a single scene class as an asyncio subprocess or on the daemon."""
+        timeout = timeout or self.render_timeout
+        start = time.perf_counter()
+        if daemon is not None:
             try:
-                # Run manim render command
-                result = subprocess.run(
-                    ["manim", "-ql", "--media_dir", str(self.output_dir / "media"), 
-                     str(code_file), class_name],
-                    capture_output=True,
-                    text=True,
-                    timeout=120  # 2 minute timeout per scene
-                )
-                
-                if result.returncode == 0:
-                    # Find the rendered video file
-                    media_dir = self.output_dir / "media" / "videos" / code_file.stem / "480p15"
-                    if media_dir.exists():
-                        video_files = list(media_dir.glob(f"*{class_name}*.mp4"))
-                        if video_files:
-                            rendered_videos.append(video_files[0])
-                            print(f"   ✅ Rendered: {video_files[0].name}")
-                        else:
-                            print(f"   ⚠️  Video file not found for {class_name}")
-                    else:
-                        print(f"   ⚠️  Media directory not found")
-                else:
-                    print(f"   ❌ Rendering failed for {class_name}")
-                    if "ModuleNotFoundError" in result.stderr:
-                        print(f"   Missing dependency. Install: pip install scikit-learn")
-                    
-            except subprocess.TimeoutExpired:
-                print(f"   ⏱️  Timeout rendering {class_name}")
+                response = await daemon.arender(code_file, class_name, self.output_dir / "media",
+                                                self.render_quality["config"], timeout)
+                result = self._daemon_outcome(code_file, class_name, response, time.perf_counter() - start)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"   ❌ Error rendering {class_name}: {e}")
+                result = RenderResult(class_name, "error", None, f"Render daemon: {e}",
+                                      time.perf_counter() - start)
+            self.tracer.add_span(f"manim {class_name}", start, time.perf_counter(), "subprocess",
+                                 track=f"render {class_name}", scene=class_name,
+                                 backend="daemon", status=result.status)
+            return result
+        
+        try:
+            returncode, _, stderr = await self._run_async_subprocess(
+                self._manim_command(code_file, class_name),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            self._remove_partial_media(code_file, class_name)
+            result = RenderResult(class_name, "timeout", None,
+                                  f"Timeout after {timeout:.0f}s",
+                                  time.perf_counter() - start)
+        except asyncio.CancelledError:
+            self._remove_partial_media(code_file, class_name)
+            raise
+        except Exception as e:
+            result = RenderResult(class_name, "error", None, str(e),
+                                  time.perf_counter() - start)
+        else:
+            result = self._render_outcome(code_file, class_name, returncode, stderr,
+                                          time.perf_counter() - start)
         
-        return rendered_videos
+        # Renders overlap on the event loop thread, so give each scene its own track
+        self.tracer.add_span(f"manim {class_name}", start, time.perf_counter(), "subprocess",
+                             track=f"render {class_name}", scene=class_name, status=result.status)
+        return result
+    
+    def _manim_command(self, code_file: Path, *class_names: str) -> List[str]:
+        """Build the manim CLI invocation for one or more scene classes."""
+        return ["manim", *self.render_quality["flags"], "--media_dir", str(self.output_dir / "media"), 
+                str(code_file), *class_names]
+    
+    def _run_manim_single_process(self, 
+                                  code_file: Path, 
+                                  class_names: List[str], 
+                                  timeout: float) -> List[RenderResult]:
+        """Render several scene classes with one manim invocation."""
+        start = time.perf_counter()
+        self._clear_stale_videos(code_file, class_names)
+        try:
+            result = subprocess.run(
+                self._manim_command(code_file, *class_names),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return self._single_process_outcomes(code_file, class_names, None, "", start, True, timeout)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            return [RenderResult(name, "error", None, str(e), elapsed) for name in class_names]
+        
+        return self._single_process_outcomes(code_file, class_names, result.returncode,
+                                             result.stderr, start, False, timeout)
+    
+    def _single_process_outcomes(self, 
+                                 code_file: Path, 
+                                 class_names: List[str], 
+                                 returncode: Optional[int], 
+                                 stderr: str, 
+                                 start: float, 
+                                 timed_out: bool,
+                                 timeout: float) -> List[RenderResult]:
+        """Map the outputs of a multi-scene manim run back to individual scenes.
+        
+        Manim renders the classes in order, so each scene's render time is the
+        gap between its video's mtime and the previous one's.
+        """
+        outcomes = []
+        previous_finish = time.time() - (time.perf_counter() - start)
+        for class_name in class_names:
+            video = self._find_rendered_video(code_file, class_name)
+            if video is not None:
+                finish = video.stat().st_mtime
+                outcomes.append(RenderResult(class_name, "rendered", video, video.name,
+                                             max(0.0, finish - previous_finish)))
+                previous_finish = finish
+            elif timed_out:
+                self._remove_partial_media(code_file, class_name)
+                outcomes.append(RenderResult(class_name, "timeout", None,
+                                             f"Timeout after {timeout:.0f}s",
+                                             time.perf_counter() - start))
+            elif returncode == 0:
+                outcomes.append(RenderResult(class_name, "missing", None,
+                                             f"Video file not found for {class_name}",
+                                             time.perf_counter() - start))
+            else:
+                # The first failing scene aborts the rest of the run
+                outcomes.append(self._render_outcome(code_file, class_name, returncode or 1,
+                                                     stderr, time.perf_counter() - start))
+        return outcomes
+    
+    def _clear_stale_videos(self, code_file: Path, class_names: List[str]) -> None:
+        """Remove videos left by earlier renders so only fresh output is picked up."""
+        video_dir = self._video_dir(code_file)
+        for class_name in class_names:
+            stale = video_dir / f"{class_name}.mp4"
+            if stale.exists():
+                stale.unlink()
+    
+    def _render_outcome(self, 
+                        code_file: Path, 
+                        class_name: str, 
+                        returncode: int, 
+                        stderr: str, 
+                        elapsed: float) -> RenderResult:
+        """Turn a finished manim process into a RenderResult."""
+        if returncode != 0:
+            message = "Rendering failed"
+            missing = re.search(r"No module named '([\w.]+)'", stderr)
+            if missing:
+                module = missing.group(1).split(".")[0]
+                message += f" (missing dependency, install: pip install {module})"
+            return RenderResult(class_name, "failed", None, message, elapsed)
+        
+        # Find the rendered video file
+        video = self._find_rendered_video(code_file, class_name)
+        if video is None:
+            return RenderResult(class_name, "missing", None,
+                                f"Video file not found for {class_name}", elapsed)
+        return RenderResult(class_name, "rendered", video, video.name, elapsed)
     
-    def _concatenate_videos(self, video_files: List[Path], topic: str) -> Optional[Path]:
-        """Concatenate multiple videos into one final video."""
+    def _remove_partial_media(self, code_file: Path, class_name: str) -> None:
+        """Delete the partial movie files and any half-written video of a scene."""
+        video_dir = self._video_dir(code_file)
+        shutil.rmtree(video_dir / "partial_movie_files" / class_name, ignore_errors=True)
+        partial_video = video_dir / f"{class_name}.mp4"
+        if partial_video.exists():
+            partial_video.unlink()
+    
+    async def _run_async_subprocess(self, command: List[str], timeout: float) -> Tuple[int, str, str]:
+        """Run a command without blocking the event loop.
+        
+        The child is killed if it times out or the awaiting task is cancelled.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except BaseException:
+            # Timeout or cancellation: take down the child and anything it spawned
+            self._kill_process_group(process)
+            try:
+                await asyncio.shield(process.wait())
+            except BaseException:
+                pass
+            raise
+        return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    
+    def _kill_process_group(self, process: "asyncio.subprocess.Process") -> None:
+        """Kill a child started in its own session, including its children."""
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+    
+    def _find_rendered_video(self, code_file: Path, class_name: str) -> Optional[Path]:
+        """Locate the mp4 manim wrote for a scene class, if any."""
+        media_dir = self._video_dir(code_file)
+        if not media_dir.exists():
+            return None
+        video_files = list(media_dir.glob(f"{class_name}.mp4"))
+        if not video_files:
+            video_files = list(media_dir.glob(f"*{class_name}*.mp4"))
+        return video_files[0] if video_files else None
+    
+    def _video_dir(self, code_file: Path) -> Path:
+        """Directory manim writes a code file's scene videos to."""
+        return self.output_dir / "media" / "videos" / code_file.stem / self.render_quality["subdir"]
+    
+    def _report_render_result(self, index: int, total: int, result: RenderResult) -> None:
+        """Print the outcome of a single scene render."""
+        prefix = f"   [{index + 1}/{total}] {result.class_name}"
+        if result.status == "rendered":
+            print(f"{prefix} ✅ Rendered: {result.message} ({result.elapsed:.1f}s)")
+        elif result.status == "cached":
+            print(f"{prefix} ♻️  Reused cached render")
+        elif result.status == "timeout":
+            print(f"{prefix} ⏱️  {result.message}")
+        elif result.status == "missing":
+            print(f"{prefix} ⚠️  {result.message}")
+        elif result.status == "failed":
+            print(f"{prefix} ❌ {result.message}")
+        else:
+            print(f"{prefix} ❌ Error rendering: {result.message}")
+    
+    def _concatenate_videos(self, 
+                            video_files: List[Path], 
+                            topic: str, 
+                            name: str = "final",
+                            scale_to: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+        """Concatenate multiple videos into one final video.
+        
+        ``scale_to`` (a render quality preset) re-encodes videos of mixed
+        resolutions to that frame size and rate instead of stream-copying.
+        """
         if not video_files:
             return None
         
+        # Output file
+        final_video = self.output_dir / f"{topic}_{name}.mp4"
+        
         if len(video_files) == 1:
             # Only one video, just copy it
-            final_path = self.output_dir / f"{topic}_final.mp4"
-            shutil.copy(video_files[0], final_path)
-            return final_path
+            shutil.copy(video_files[0], final_video)
+            return final_video
         
         # Check if ffmpeg is available
         try:
             subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
         except (subprocess.CalledProcessError, FileNotFoundError):
-            print("   ⚠️  ffmpeg not found. Cannot concatenate videos.")
-            print("   Install ffmpeg to enable video concatenation")
-            print("   Individual scene videos are still available")
+            self._report_missing_ffmpeg()
             return None
         
         # Create concat file list
-        concat_file = self.output_dir / "concat_list.txt"
-        with open(concat_file, 'w') as f:
-            for video_file in video_files:
-                f.write(f"file '{video_file.absolute()}'\n")
-        
-        # Output file
-        final_video = self.output_dir / f"{topic}_final.mp4"
+        concat_file, command = self._concat_job(video_files, final_video, scale_to)
         
         try:
             # Run ffmpeg concatenation
-            print(f"   Concatenating {len(video_files)} videos...")
-            result = subprocess.run(
-                ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(concat_file),
-                 "-c", "copy", "-y", str(final_video)],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            print(f"   Concatenating {len(video_files)} videos{' (re-encoding)' if scale_to else ''}...")
+            with self.tracer.span("ffmpeg concat", "subprocess", videos=len(video_files), output=final_video.name):
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    timeout=self._concat_timeout(video_files, scale_to)
+                )
             
             if result.returncode == 0:
                 # Clean up concat file
-                concat_file.unlink()
+                if concat_file is not None:
+                    concat_file.unlink()
                 return final_video
             else:
                 print(f"   ⚠️  Concatenation failed")
@@ -351,6 +1397,117 @@ class VisualizationPipeline:
             print(f"   ❌ Error concatenating videos: {e}")
             return None
     
+    async def _aconcatenate_videos(self, 
+                                   video_files: List[Path], 
+                                   topic: str, 
+                                   name: str = "final",
+                                   scale_to: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+        """Concatenate videos with an asyncio ffmpeg subprocess."""
+        if not video_files:
+            return None
+        
+        final_video = self.output_dir / f"{topic}_{name}.mp4"
+        
+        if len(video_files) == 1:
+            # Only one video, just copy it
+            await asyncio.to_thread(shutil.copy, video_files[0], final_video)
+            return final_video
+        
+        # Check if ffmpeg is available
+        try:
+            returncode, _, _ = await self._run_async_subprocess(["ffmpeg", "-version"], timeout=30)
+        except FileNotFoundError:
+            returncode = 1
+        if returncode != 0:
+            self._report_missing_ffmpeg()
+            return None
+        
+        concat_file, command = self._concat_job(video_files, final_video, scale_to)
+        
+        print(f"   Concatenating {len(video_files)} videos{' (re-encoding)' if scale_to else ''}...")
+        start = time.perf_counter()
+        try:
+            returncode, _, _ = await self._run_async_subprocess(
+                command,
+                timeout=self._concat_timeout(video_files, scale_to)
+            )
+        except asyncio.TimeoutError:
+            print(f"   ⏱️  Timeout during concatenation")
+            return None
+        except asyncio.CancelledError:
+            # Don't leave a truncated final video behind
+            for partial in (final_video, concat_file):
+                if partial is not None and partial.exists():
+                    partial.unlink()
+            raise
+        except Exception as e:
+            print(f"   ❌ Error concatenating videos: {e}")
+            return None
+        finally:
+            self.tracer.add_span("ffmpeg concat", start, time.perf_counter(), "subprocess",
+                                 videos=len(video_files), output=final_video.name)
+        
+        if returncode == 0:
+            # Clean up concat file
+            if concat_file is not None:
+                concat_file.unlink()
+            return final_video
+        print(f"   ⚠️  Concatenation failed")
+        return None
+    
+    def _concat_job(self, 
+                    video_files: List[Path], 
+                    final_video: Path, 
+                    scale_to: Optional[Dict[str, Any]]) -> Tuple[Optional[Path], List[str]]:
+        """The ffmpeg command for a concatenation and the list file it reads, if any."""
+        if scale_to is not None:
+            return None, self._scaled_concat_command(video_files, final_video, scale_to)
+        concat_file = self._write_concat_list(video_files, final_video)
+        return concat_file, self._concat_command(concat_file, final_video)
+    
+    def _concat_timeout(self, video_files: List[Path], scale_to: Optional[Dict[str, Any]]) -> float:
+        """Stream copies are quick; re-encoding takes time per video."""
+        return 60 if scale_to is None else 60 * len(video_files)
+    
+    def _write_concat_list(self, video_files: List[Path], final_video: Path) -> Path:
+        """Write the ffmpeg concat demuxer file list."""
+        # One list per output, so draft and final concatenations can overlap
+        concat_file = self.output_dir / f"{final_video.stem}_concat_list.txt"
+        with open(concat_file, 'w') as f:
+            for video_file in video_files:
+                f.write(f"file '{video_file.absolute()}'\n")
+        return concat_file
+    
+    def _concat_command(self, concat_file: Path, final_video: Path) -> List[str]:
+        """Build the ffmpeg stream-copy concatenation command."""
+        return ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(concat_file),
+                "-c", "copy", "-y", str(final_video)]
+    
+    def _scaled_concat_command(self, 
+                               video_files: List[Path], 
+                               final_video: Path, 
+                               quality: Dict[str, Any]) -> List[str]:
+        """Build an ffmpeg command joining videos of different sizes at one quality.
+        
+        Each input is scaled (letterboxed if its aspect differs) and
+        resampled to the preset's frame rate before the concat filter.
+        """
+        width, height = quality["resolution"]
+        inputs, filters = [], []
+        for i, video_file in enumerate(video_files):
+            inputs += ["-i", str(video_file)]
+            filters.append(f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                           f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={quality['fps']}[v{i}]")
+        streams = "".join(f"[v{i}]" for i in range(len(video_files)))
+        filters.append(f"{streams}concat=n={len(video_files)}:v=1:a=0[out]")
+        return ["ffmpeg", *inputs, "-filter_complex", ";".join(filters), "-map", "[out]",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p", "-y", str(final_video)]
+    
+    def _report_missing_ffmpeg(self) -> None:
+        print("   ⚠️  ffmpeg not found. Cannot concatenate videos.")
+        print("   Install ffmpeg to enable video concatenation")
+        print("   Individual scene videos are still available")
+    
     def quick_demo(self, demo_text: str = None) -> Dict[str, Any]:
         """Run a quick demo of the pipeline."""
         if demo_text is None:
@@ -369,3 +1526,129 @@ def run_pca_pipeline(text_input: str, output_dir: str = "output") -> Dict[str, A
     """Convenience function to run the complete PCA visualization pipeline."""
     pipeline = VisualizationPipeline(output_dir)
     return pipeline.generate_visualization(text_input, "pca")
+
+
+# Pipeline reused by every job a batch worker process runs
+_batch_pipeline: Optional[VisualizationPipeline] = None
+_batch_root: Optional[Path] = None
+
+
+def _init_batch_worker(output_dir: str, pipeline_kwargs: Dict[str, Any]) -> None:
+    """Build the stage objects once per batch worker process."""
+    global _batch_pipeline, _batch_root
+    _batch_root = Path(output_dir)
+    _batch_pipeline = VisualizationPipeline(output_dir, **pipeline_kwargs)
+
+
+def _run_batch_job(name: str, text_input: str, topic: str, max_iterations: int) -> BatchJobResult:
+    """Run one batch input in its own output subdirectory."""
+    job_dir = _batch_root / name
+    job_dir.mkdir(parents=True, exist_ok=True)
+    _batch_pipeline.output_dir = job_dir
+    
+    start = time.perf_counter()
+    try:
+        result = _batch_pipeline.generate_visualization(text_input, topic, max_iterations)
+    except Exception as e:
+        return BatchJobResult(name, str(job_dir), False, False,
+                              time.perf_counter() - start, None, str(e))
+    
+    return BatchJobResult(
+        name=name,
+        output_dir=str(job_dir),
+        success=True,
+        approved=result["pipeline_success"],
+        elapsed=time.perf_counter() - start,
+        final_video=result["output_files"]["final_video"],
+        error=None
+    )
+
+
+def generate_batch(inputs: Union[Sequence[str], Dict[str, str]],
+                   output_dir: str = "output",
+                   topic: str = "pca",
+                   jobs: Optional[int] = None,
+                   max_iterations: int = 3,
+                   **pipeline_kwargs: Any) -> Dict[str, Any]:
+    """Run many text inputs through shared pipelines on a process pool.
+    
+    ``inputs`` is either a list of texts (jobs are named ``job_001``, ...) or a
+    dict mapping job names to texts. Every job writes to its own subdirectory
+    of ``output_dir``; the render cache is shared between them. Each worker
+    process builds its pipeline stages once and reuses them for all its jobs.
+    Extra keyword arguments are passed to ``VisualizationPipeline``.
+    """
+    if isinstance(inputs, dict):
+        named_inputs = list(inputs.items())
+    else:
+        named_inputs = [(f"job_{i + 1:03d}", text) for i, text in enumerate(inputs)]
+    
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(named_inputs) or 1))
+    
+    # Split the CPUs between concurrent jobs rather than oversubscribing renders
+    if pipeline_kwargs.get("render_workers") is None:
+        pipeline_kwargs["render_workers"] = max(1, (os.cpu_count() or 1) // jobs)
+    
+    print(f"📦 Running {len(named_inputs)} batch jobs with {jobs} worker(s)...")
+    start = time.perf_counter()
+    results: List[Optional[BatchJobResult]] = [None] * len(named_inputs)
+    
+    if jobs == 1:
+        _init_batch_worker(str(root), pipeline_kwargs)
+        for i, (name, text) in enumerate(named_inputs):
+            results[i] = _run_batch_job(name, text, topic, max_iterations)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=_init_batch_worker,
+                                 initargs=(str(root), pipeline_kwargs)) as executor:
+            futures = {
+                executor.submit(_run_batch_job, name, text, topic, max_iterations): i
+                for i, (name, text) in enumerate(named_inputs)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    name = named_inputs[i][0]
+                    results[i] = BatchJobResult(name, str(root / name), False, False,
+                                                0.0, None, str(e))
+    
+    total_elapsed = time.perf_counter() - start
+    summary = format_batch_summary(results, total_elapsed)
+    summary_file = root / "batch_summary.md"
+    with open(summary_file, 'w') as f:
+        f.write(summary)
+    
+    print(summary)
+    print(f"📋 Batch summary saved to: {summary_file}")
+    
+    return {
+        "jobs": results,
+        "summary": summary,
+        "summary_file": str(summary_file),
+        "total_elapsed": total_elapsed
+    }
+
+
+def format_batch_summary(results: List[BatchJobResult], total_elapsed: float) -> str:
+    """Render batch results as a markdown table."""
+    succeeded = sum(1 for r in results if r.success)
+    approved = sum(1 for r in results if r.approved)
+    
+    summary = "# Batch Summary\n\n"
+    summary += f"- **Jobs:** {len(results)}\n"
+    summary += f"- **Succeeded:** {succeeded}/{len(results)}\n"
+    summary += f"- **Approved:** {approved}/{len(results)}\n"
+    summary += f"- **Wall Time:** {total_elapsed:.1f}s\n\n"
+    
+    summary += "| Job | Success | Approved | Time (s) | Final Video | Error |\n"
+    summary += "|-----|---------|----------|----------|-------------|-------|\n"
+    for r in results:
+        summary += (f"| {r.name} | {'✅' if r.success else '❌'} | {'✅' if r.approved else '⚠️'} "
+                    f"| {r.elapsed:.1f} | {r.final_video or '-'} | {r.error or ''} |\n")
+    
+    return summary
@@ -0,0 +1,120 @@
+"""
+Render Cache: Content-addressed store of rendered scene videos.
+"""
+from typing import List, Optional
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class RenderCache:
+    """Maps a hash of a scene's render inputs to a stored mp4, with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self,
+                 scene_source: str,
+                 header: str,
+                 manim_version: str,
+                 quality_flags: List[str]) -> str:
+        """Build the cache key for one scene class."""
+        digest = hashlib.sha256()
+        for part in (scene_source, header, manim_version, " ".join(quality_flags)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached video for a key, marking it as recently used."""
+        path = self._entry_path(key)
+
+        # Modification time doubles as the LRU timestamp; touching it also
+        # finds out whether the entry exists, or was just evicted by another
+        # process sharing the cache
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, video_file: Path) -> Path:
+        """Store a rendered video under a key and evict old entries if needed."""
+        path = self._entry_path(key)
+
+        # Copy to a temp file first so concurrent readers never see a partial mp4
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(video_file, tmp_name)
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def restore(self, key: str, destination: Path) -> Optional[Path]:
+        """Place a cached video at destination, returning None on a cache miss."""
+        cached = self.get(key)
+        if cached is None:
+            return None
+
+        # Copy rather than hard link: manim rewrites outputs in place, which
+        # would otherwise corrupt the cached entry on the next render.
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            shutil.copyfile(cached, destination)
+        except OSError:
+            # Evicted by another process since get(); render it instead
+            self.hits -= 1
+            self.misses += 1
+            destination.unlink(missing_ok=True)
+            return None
+        return destination
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.mp4"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def size_bytes(self) -> int:
+        """Total size of all cached videos."""
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*.mp4"))
+
+    def clear(self) -> None:
+        """Remove every cached video."""
+        for path in self.cache_dir.glob("*.mp4"):
+            path.unlink()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
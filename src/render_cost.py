@@ -0,0 +1,158 @@
+"""
+Render Cost: Predicts how long a scene takes to render.
+
+Scenes differ by more than an order of magnitude in render time, driven by
+how many frames they have, at what resolution, and how many objects (above
+all data points) each frame draws. The model is linear in those per-scene
+features; it starts from rough prior coefficients and is refitted, with a
+ridge penalty towards the prior, from the render timings of earlier runs,
+which are stored as JSON.
+"""
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import json
+import os
+import re
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows; saves there merge without locking
+    fcntl = None
+import numpy as np
+from visual_mapper import VisualElementType
+
+
+# Seconds per unit of each feature before any timings are recorded
+PRIOR_COEFFICIENTS = {
+    "process_startup": 3.0,  # manim import and scene setup in a fresh process
+    "megapixel_frames": 0.02,  # encoding and drawing the background
+    "element_frames": 0.002,  # per non-point object per frame
+    "point_frames": 0.0005,  # per data point per frame
+    "animations": 0.05,
+}
+FEATURES = list(PRIOR_COEFFICIENTS)
+
+# Recorded timings kept, most recent last
+MAX_SAMPLES = 500
+
+# Predictions set timeouts only once this many renders have been timed
+MIN_SAMPLES_FOR_TIMEOUTS = 10
+
+# Per-scene timeout: a multiple of the prediction plus a margin, within bounds
+TIMEOUT_FACTOR = 3.0
+TIMEOUT_MARGIN = 20.0
+MIN_TIMEOUT = 30.0
+MAX_TIMEOUT = 1800.0
+
+
+def scene_features(scene_visual: Dict[str, Any], duration: float, quality_subdir: str, daemon: bool = False) -> Dict[str, float]:
+    """Cost features of one scene at one render quality.
+
+    ``duration`` is the scene's timeline length in seconds and
+    ``quality_subdir`` the manim quality directory (e.g. "480p15").
+    """
+    height, fps = (int(v) for v in re.fullmatch(r"(\d+)p(\d+)", quality_subdir).groups())
+    frames = duration * fps
+    megapixels = height * height * 16 / 9 / 1e6
+
+    n_points = 0
+    n_elements = 0
+    n_animations = 0
+    for element in scene_visual["elements"]:
+        if element.element_type == VisualElementType.POINT_CLOUD:
+            n_points += len(element.properties["positions"])
+        elif element.element_type == VisualElementType.POINT:
+            n_points += 1
+        else:
+            n_elements += 1
+        n_animations += len(element.animation_sequence)
+
+    return {
+        "process_startup": 0.0 if daemon else 1.0,
+        "megapixel_frames": frames * megapixels,
+        "element_frames": frames * n_elements,
+        "point_frames": frames * n_points,
+        "animations": float(n_animations + len(scene_visual.get("camera_movements", []))),
+    }
+
+
+class RenderCostModel:
+    """Linear render-time model fitted to recorded timings."""
+
+    def __init__(self, timings_file: Optional[str] = None, ridge: float = 1.0):
+        self.timings_file = Path(timings_file) if timings_file else None
+        self.ridge = ridge
+        self.samples: List[Dict[str, Any]] = []  # {"features": {...}, "seconds": float}
+        # Recorded here since the last save; other processes may have saved meanwhile
+        self.unsaved: List[Dict[str, Any]] = []
+        self.coefficients = dict(PRIOR_COEFFICIENTS)
+        if self.timings_file is not None and self.timings_file.exists():
+            self.samples = self._read_samples()
+            self.fit()
+
+    def predict(self, features: Dict[str, float]) -> float:
+        """Predicted render time in seconds."""
+        return max(0.0, sum(self.coefficients[name] * features.get(name, 0.0) for name in FEATURES))
+
+    def timeout_for(self, features: Dict[str, float], default: float) -> float:
+        """Timeout for one scene; ``default`` until enough renders have been timed."""
+        if len(self.samples) < MIN_SAMPLES_FOR_TIMEOUTS:
+            return default
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, self.predict(features) * TIMEOUT_FACTOR + TIMEOUT_MARGIN))
+
+    def record(self, features: Dict[str, float], seconds: float) -> None:
+        """Add one measured render time."""
+        sample = {"features": features, "seconds": seconds}
+        self.samples.append(sample)
+        del self.samples[:-MAX_SAMPLES]
+        self.unsaved.append(sample)
+
+    def fit(self) -> None:
+        """Refit the coefficients to the recorded timings.
+
+        Each feature is scaled to unit mean square so the ridge penalty,
+        which pulls towards the prior, treats them alike; coefficients are
+        kept non-negative.
+        """
+        if not self.samples:
+            self.coefficients = dict(PRIOR_COEFFICIENTS)
+            return
+
+        X = np.array([[s["features"].get(name, 0.0) for name in FEATURES] for s in self.samples])
+        y = np.array([s["seconds"] for s in self.samples])
+        scale = np.sqrt(np.mean(X ** 2, axis=0))
+        scale[scale == 0] = 1.0
+        Xs = X / scale
+        prior = np.array([PRIOR_COEFFICIENTS[name] for name in FEATURES]) * scale
+
+        penalty = self.ridge * np.eye(len(FEATURES))
+        weights = np.linalg.solve(Xs.T @ Xs + penalty, Xs.T @ y + penalty @ prior)
+        self.coefficients = dict(zip(FEATURES, np.clip(weights / scale, 0.0, None).tolist()))
+
+    def save(self) -> None:
+        """Add the new timings to the file atomically.
+
+        Batch workers share one file, so the samples on disk are re-read and
+        this model's unsaved ones appended under a lock, rather than
+        overwriting what other processes saved since this one loaded.
+        """
+        if self.timings_file is None:
+            return
+        self.timings_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.timings_file.with_name(self.timings_file.name + ".lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self.samples = (self._read_samples() + self.unsaved)[-MAX_SAMPLES:]
+            fd, tmp_name = tempfile.mkstemp(dir=self.timings_file.parent, suffix=".json")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"samples": self.samples}, f)
+            os.replace(tmp_name, self.timings_file)
+        self.unsaved = []
+
+    def _read_samples(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.timings_file) as f:
+                return json.load(f)["samples"][-MAX_SAMPLES:]
+        except (OSError, ValueError, KeyError):
+            return []
@@ -0,0 +1,339 @@
+"""
+Render Daemon: Long-lived pool of warm manim workers served over a Unix socket.
+
+Forking a fresh ``manim`` CLI per scene pays interpreter startup plus the
+``manim`` and numpy imports every time. The daemon's fork server imports
+them once and forks one process per job from there, so each job only loads
+the generated scene module and renders the requested class in-process. A
+job that times out is killed together with anything it started, so it can
+neither hold a worker slot nor write a late video.
+
+Start it with:
+
+    python src/render_daemon.py --socket /tmp/mlviz-render.sock --workers 4
+
+and point the pipeline at it with
+``VisualizationPipeline(render_daemon="/tmp/mlviz-render.sock")``.
+
+The protocol is one JSON request line per connection. A render request is
+answered with a ``{"status": "started"}`` line once it leaves the queue and
+a response line when it finishes; its timeout only runs from the start. A
+client that hangs up while its job is queued or rendering cancels the job.
+"""
+from typing import Dict, Any, Callable, Optional, Set
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+
+def _warm_imports() -> str:
+    """Import the heavy modules every render needs and return the manim version."""
+    import manim
+    import numpy  # noqa: F401
+    return f"Manim Community v{manim.__version__}"
+
+
+def _load_scene_module(code_file: str) -> Any:
+    """Import a generated scene file under a name unique to its contents."""
+    stat = os.stat(code_file)
+    key = (code_file, stat.st_mtime_ns, stat.st_size)
+    module_name = "_mlviz_scenes_" + hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+    spec = importlib.util.spec_from_file_location(module_name, code_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _render_in_worker(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one scene class inside a warm job process."""
+    from manim import tempconfig
+
+    start = time.perf_counter()
+    try:
+        module = _load_scene_module(request["code_file"])
+        scene_class = getattr(module, request["scene"])
+        overrides = {
+            "input_file": request["code_file"],
+            "media_dir": request["media_dir"],
+            "quality": request.get("quality", "low_quality"),
+        }
+        with tempconfig(overrides):
+            scene = scene_class()
+            scene.render()
+            video = scene.renderer.file_writer.movie_file_path
+        return {"status": "rendered", "video": str(video),
+                "elapsed": time.perf_counter() - start}
+    except Exception:
+        return {"status": "failed", "error": traceback.format_exc(),
+                "elapsed": time.perf_counter() - start}
+
+
+def _client_gone(client: socket.socket) -> bool:
+    """Whether the client hung up; it sends nothing after its request line."""
+    readable, _, _ = select.select([client], [], [], 0)
+    if not readable:
+        return False
+    try:
+        return client.recv(1, socket.MSG_PEEK) == b""
+    except OSError:
+        return True
+
+
+def _run_job(request: Dict[str, Any], sender: Connection) -> None:
+    """Entry point of a job process: render and send the response back."""
+    # Lead a process group so a timeout also kills manim's ffmpeg children
+    os.setpgid(0, 0)
+    sender.send(_render_in_worker(request))
+    sender.close()
+
+
+class RenderDaemon:
+    """Serves render jobs in killable processes forked from a pre-warmed fork server."""
+
+    def __init__(self, socket_path: str, workers: Optional[int] = None):
+        self.socket_path = socket_path
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.manim_version = ""
+        self.context = None
+        self.slots = threading.BoundedSemaphore(self.workers)
+        self.jobs: Set[multiprocessing.process.BaseProcess] = set()
+        self.jobs_lock = threading.Lock()
+        self.server = None
+
+    def serve_forever(self) -> None:
+        """Warm up the fork server and handle requests until stopped."""
+        self.manim_version = _warm_imports()
+        # Jobs fork from a single-threaded server that has the heavy modules
+        # imported, never from this process's request threads
+        self.context = multiprocessing.get_context("forkserver")
+        self.context.set_forkserver_preload(["manim", "numpy"])
+        warmup = self.context.Process(target=_warm_imports)
+        warmup.start()
+        warmup.join()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    response = daemon.handle_request(json.loads(line), self.connection,
+                                                     lambda: self.send({"status": "started"}))
+                except ConnectionError:
+                    # The client hung up
+                    return
+                except Exception as e:
+                    response = {"status": "error", "error": str(e)}
+                if response is not None:
+                    self.send(response)
+
+            def send(self, message):
+                self.wfile.write((json.dumps(message) + "\n").encode())
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        signal.signal(signal.SIGTERM, lambda *_: self._shutdown_async())
+
+        print(f"🔥 Render daemon ready on {self.socket_path} "
+              f"({self.workers} warm workers, {self.manim_version})")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def handle_request(self,
+                       request: Dict[str, Any],
+                       client: Optional[socket.socket] = None,
+                       started: Optional[Callable[[], None]] = None) -> Optional[Dict[str, Any]]:
+        """Dispatch one decoded request; None when its client has gone away.
+
+        ``started`` is called once a render leaves the queue, which is
+        when its timeout starts.
+        """
+        if request.get("op") == "ping":
+            return {"status": "ok", "manim_version": self.manim_version,
+                    "workers": self.workers}
+
+        # At most ``workers`` jobs render at once; the rest wait for a slot
+        with self.slots:
+            if client is not None and _client_gone(client):
+                # Nobody is waiting for this job any more
+                return None
+            if started is not None:
+                started()
+            return self._render(request, client)
+
+    def _render(self, request: Dict[str, Any], client: Optional[socket.socket] = None) -> Optional[Dict[str, Any]]:
+        """Run one render job in its own process, killing it on timeout or when the client hangs up."""
+        start = time.perf_counter()
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_run_job, args=(request, sender), daemon=True)
+        with self.jobs_lock:
+            self.jobs.add(process)
+        try:
+            process.start()
+            sender.close()
+            timeout = request.get("timeout")
+            deadline = None if timeout is None else time.monotonic() + timeout
+            waiting = [receiver] if client is None else [receiver, client]
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                ready = wait(waiting, remaining)
+                if receiver in ready:
+                    return receiver.recv()
+                if not ready:
+                    self._kill_job(process)
+                    return {"status": "timeout", "error": f"Timeout after {timeout}s"}
+                waiting.remove(client)
+                if _client_gone(client):
+                    self._kill_job(process)
+                    return None
+        except EOFError:
+            # The job process died without answering
+            process.join()
+            return {"status": "failed", "error": f"Render process exited with code {process.exitcode}",
+                    "elapsed": time.perf_counter() - start}
+        finally:
+            receiver.close()
+            process.join()
+            with self.jobs_lock:
+                self.jobs.discard(process)
+
+    def _kill_job(self, process: multiprocessing.process.BaseProcess) -> None:
+        """Kill a job process and everything it started."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            # The job has not become a group leader yet
+            process.kill()
+        process.join()
+
+    def close(self) -> None:
+        """Kill running jobs and remove the socket."""
+        if self.server is not None:
+            self.server.server_close()
+        with self.jobs_lock:
+            jobs = list(self.jobs)
+        for process in jobs:
+            if process.is_alive():
+                self._kill_job(process)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _shutdown_async(self) -> None:
+        # shutdown() blocks until serve_forever returns, so call it off-thread
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class RenderDaemonClient:
+    """Sends render jobs to a running RenderDaemon."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+
+    def ping(self, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+        """Return daemon info, or None if no daemon is listening."""
+        try:
+            return self._request({"op": "ping"}, timeout)
+        except OSError:
+            return None
+
+    def render(self,
+               code_file: Path,
+               scene: str,
+               media_dir: Path,
+               quality: str = "low_quality",
+               timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Render one scene class and return the daemon's response."""
+        request = self._render_request(code_file, scene, media_dir, quality, timeout)
+        # Leave the socket a little longer than the job so the daemon can report a timeout
+        return self._request(request, timeout + 5 if timeout else None, queued=True)
+
+    async def arender(self,
+                      code_file: Path,
+                      scene: str,
+                      media_dir: Path,
+                      quality: str = "low_quality",
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Coroutine version of render."""
+        request = self._render_request(code_file, scene, media_dir, quality, timeout)
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+            # Queued jobs wait without a limit; closing the connection on
+            # cancellation makes the daemon drop or kill the job
+            response = self._decode(await reader.readline())
+            if response.get("status") == "started":
+                response = self._decode(await asyncio.wait_for(reader.readline(),
+                                                               timeout + 5 if timeout else None))
+        finally:
+            writer.close()
+        return response
+
+    def _render_request(self,
+                        code_file: Path,
+                        scene: str,
+                        media_dir: Path,
+                        quality: str,
+                        timeout: Optional[float]) -> Dict[str, Any]:
+        return {
+            "op": "render",
+            "code_file": str(Path(code_file).absolute()),
+            "scene": scene,
+            "media_dir": str(Path(media_dir).absolute()),
+            "quality": quality,
+            "timeout": timeout,
+        }
+
+    def _request(self, request: Dict[str, Any], timeout: Optional[float], queued: bool = False) -> Dict[str, Any]:
+        """Send one request; a ``queued`` one waits without a timeout until it starts."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(None if queued else timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(request) + "\n").encode())
+            with sock.makefile("rb") as reader:
+                response = self._decode(reader.readline())
+                if queued and response.get("status") == "started":
+                    sock.settimeout(timeout)
+                    response = self._decode(reader.readline())
+        return response
+
+    def _decode(self, line: bytes) -> Dict[str, Any]:
+        if not line:
+            raise ConnectionError("Render daemon closed the connection")
+        return json.loads(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Warm manim render worker pool")
+    parser.add_argument("--socket", default="/tmp/mlviz-render.sock",
+                        help="Unix socket path to listen on")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    RenderDaemon(args.socket, args.workers).serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
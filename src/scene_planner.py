@@ -1,12 +1,18 @@
 """
 Scene Planner: Breaks down concepts into structured scenes for animation.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, TypeVar
 from dataclasses import dataclass
 from enum import Enum
 from concept_parser import ParsedConcept, ConceptType
 
 
+T = TypeVar("T")
+
+# Bump when planning changes, invalidating cached plans
+PLANNER_VERSION = 1
+
+
 class SceneType(Enum):
     INTRODUCTION = "introduction"
     CONCEPT_EXPLANATION = "concept_explanation"
@@ -188,12 +194,20 @@ class ScenePlanner:
         visual_concepts = [c for c in concepts if c.concept_type == ConceptType.VISUAL_ELEMENT]
         process_concepts = [c for c in concepts if c.concept_type == ConceptType.PROCESS_STEP]
         
-        if math_concepts:
-            scenes.append(self._create_generic_scene("Mathematical Concepts", math_concepts))
-        if visual_concepts:
-            scenes.append(self._create_generic_scene("Visual Elements", visual_concepts))
-        if process_concepts:
-            scenes.append(self._create_generic_scene("Process Steps", process_concepts))
+        groups = [(name, group) for name, group in [("Mathematical Concepts", math_concepts),
+                                                     ("Visual Elements", visual_concepts),
+                                                     ("Process Steps", process_concepts)] if group]
+        
+        # Scenes follow the strongest co-occurrence links between their concepts,
+        # starting from the group holding the most important concept
+        groups = order_by_relationships(
+            groups,
+            weight=lambda a, b: sum(x.relationship_weights.get(y.name, 0.0) for x in a[1] for y in b[1]),
+            priority=lambda group: (max(c.importance_score for c in group[1]),
+                                    -min(c.first_position for c in group[1]))
+        )
+        for name, group in groups:
+            scenes.append(self._create_generic_scene(name, group))
         
         return scenes
     
@@ -202,6 +216,12 @@ class ScenePlanner:
         elements = []
         total_duration = 0
         
+        # Strongly related concepts are shown one after the other
+        concepts = order_by_relationships(
+            concepts,
+            weight=lambda a, b: a.relationship_weights.get(b.name, 0.0),
+            priority=lambda c: (c.importance_score, -c.first_position)
+        )
         for concept in concepts:
             duration = 3.0 + concept.importance_score * 5.0
             element = SceneElement(
@@ -246,6 +266,30 @@ class ScenePlanner:
         return scenes
 
 
+def order_by_relationships(items: List[T], 
+                           weight: Callable[[T, T], float], 
+                           priority: Callable[[T], Any]) -> List[T]:
+    """Greedy walk along the heaviest relationship edges.
+    
+    Starts at the highest-priority item and repeatedly moves to the unvisited
+    item with the strongest edge from the current one; when none is linked,
+    it jumps to the highest-priority item left.
+    """
+    remaining = list(items)
+    ordered: List[T] = []
+    while remaining:
+        current = ordered[-1] if ordered else None
+        linked = [(weight(current, item), item) for item in remaining] if current is not None else []
+        linked = [pair for pair in linked if pair[0] > 0]
+        if linked:
+            nxt = max(linked, key=lambda pair: (pair[0], priority(pair[1])))[1]
+        else:
+            nxt = max(remaining, key=priority)
+        remaining.remove(nxt)
+        ordered.append(nxt)
+    return ordered
+
+
 def plan_pca_visualization(concepts: List[ParsedConcept]) -> List[Scene]:
     """Convenience function to plan PCA visualization scenes."""
     planner = ScenePlanner()
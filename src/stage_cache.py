@@ -0,0 +1,94 @@
+"""
+Stage Cache: Reuses parse, plan and map results across runs.
+
+Each stage result is stored under a hash of that stage's own inputs and its
+version, so an edit that leaves the parsed concepts unchanged still reuses the
+plan and mapping further down. Results are kept in memory and pickled to disk,
+and handed out as deep copies because later stages mutate them.
+"""
+from typing import Any, Dict, Optional
+from collections import Counter, OrderedDict
+from pathlib import Path
+import copy
+import os
+import pickle
+import tempfile
+from fingerprint import fingerprint
+
+
+class StageCache:
+    """Two-level (memory, then disk) cache of pipeline stage results."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = 256):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits: Counter = Counter()  # per stage
+        self.misses: Counter = Counter()
+
+    def make_key(self, stage: str, version: int, *inputs: Any) -> str:
+        """Key for one stage run from its version and everything it reads."""
+        return f"{stage}-{fingerprint((stage, version, inputs))}"
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        """A copy of the cached result, or None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits[stage] += 1
+            return copy.deepcopy(self._memory[key])
+
+        value = self._read(key)
+        if value is None:
+            self.misses[stage] += 1
+            return None
+        self._remember(key, value)
+        self.hits[stage] += 1
+        return copy.deepcopy(value)
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        """Store a copy of a stage result, so later edits to it are not cached."""
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        self._write(key, value)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {stage: {"hits": self.hits[stage], "misses": self.misses[stage]}
+                for stage in sorted(set(self.hits) | set(self.misses))}
+
+    def clear(self) -> None:
+        """Drop every cached result, in memory and on disk."""
+        self._memory.clear()
+        if self.cache_dir is not None and self.cache_dir.exists():
+            for entry in self.cache_dir.glob("*.pickle"):
+                entry.unlink(missing_ok=True)
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Any]:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.cache_dir / f"{key}.pickle", "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Missing, partially written by a killed process, or from older code
+            return None
+
+    def _write(self, key: str, value: Any) -> None:
+        """Write atomically so concurrent batch workers never read a partial entry."""
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, self.cache_dir / f"{key}.pickle")
+
+
+def normalize_text(text: str) -> str:
+    """Parser-equivalent form of a text: case and whitespace do not change its concepts."""
+    return " ".join(text.lower().split())
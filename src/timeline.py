@@ -0,0 +1,80 @@
+"""
+Timeline: Schedules animations given absolute start times into play() batches.
+
+Visual elements describe each animation by an absolute ``delay`` from the start
+of the scene. Manim plays animations one ``self.play()`` call after another, so
+the scheduler merges animations whose time ranges overlap into one batch and
+leaves the gaps between batches as waits.
+"""
+from typing import List, Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class TimedAnimation:
+    code: str  # Manim animation expression, timed by the enclosing play()
+    timed_code: str  # the same expression carrying its own run_time
+    start: float  # seconds from the start of the scene
+    duration: float
+    instant: str = ""  # the target in its end state, added directly when nothing takes time
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+
+@dataclass
+class TimelineBatch:
+    start: float
+    end: float
+    animations: List[TimedAnimation]
+    wait_before: float  # idle time since the previous batch ended
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def uniform_stagger(self) -> Optional[float]:
+        """Return the start-time step if every animation is equally long and evenly staggered."""
+        durations = {round(a.duration, 9) for a in self.animations}
+        if len(self.animations) < 2 or len(durations) != 1 or self.animations[0].duration <= 0:
+            return None
+
+        starts = [a.start for a in self.animations]
+        step = starts[1] - starts[0]
+        if any(abs((b - a) - step) > 1e-9 for a, b in zip(starts, starts[1:])):
+            return None
+        return step
+
+
+@dataclass
+class Timeline:
+    batches: List[TimelineBatch]
+
+    @property
+    def total_duration(self) -> float:
+        """Scene time consumed by the batches and the waits between them."""
+        return self.batches[-1].end if self.batches else 0.0
+
+
+class TimelineScheduler:
+    """Turns absolute animation start times into sequential play() batches."""
+
+    def schedule(self, animations: List[TimedAnimation]) -> Timeline:
+        """Cluster overlapping animations into batches in start-time order."""
+        batches: List[TimelineBatch] = []
+        for animation in sorted(animations, key=lambda a: a.start):
+            current = batches[-1] if batches else None
+            if current is not None and animation.start < current.end:
+                current.animations.append(animation)
+                current.end = max(current.end, animation.end)
+            else:
+                cursor = current.end if current is not None else 0.0
+                batches.append(TimelineBatch(
+                    start=animation.start,
+                    end=animation.end,
+                    animations=[animation],
+                    wait_before=max(animation.start - cursor, 0.0)
+                ))
+
+        return Timeline(batches)
@@ -0,0 +1,152 @@
+"""
+Tracer: Records pipeline stage timings as Chrome trace events.
+
+The written ``trace.json`` can be opened in Perfetto (ui.perfetto.dev) or
+chrome://tracing to inspect stage overlap and slow scenes.
+"""
+from typing import List, Dict, Any, Optional, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+class PipelineTracer:
+    """Collects complete ("X") trace events for pipeline stages and subprocesses."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events: List[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def reset(self) -> None:
+        """Drop recorded events and restart the clock."""
+        with self._lock:
+            self.events = []
+            self._thread_names = {}
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self,
+             name: str,
+             category: str = "pipeline",
+             track: Optional[str] = None,
+             **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block as one span.
+
+        The yielded dict can be filled with extra args while the span is open,
+        e.g. the outcome of a subprocess.
+        """
+        if not self.enabled:
+            yield args
+            return
+
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, time.perf_counter(), category, track=track, **args)
+
+    def add_span(self,
+                 name: str,
+                 start: float,
+                 end: float,
+                 category: str = "pipeline",
+                 track: Optional[str] = None,
+                 **args: Any) -> None:
+        """Record a span from two ``time.perf_counter()`` readings.
+
+        Spans go on the current thread's track unless ``track`` names another
+        one; overlapping spans from a single thread (e.g. asyncio subprocesses)
+        need separate tracks to display correctly.
+        """
+        if not self.enabled:
+            return
+
+        if track is None:
+            thread = threading.current_thread()
+            tid, track = thread.ident, thread.name
+        else:
+            tid = self._track_id(track)
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self._pid,
+            "tid": tid,
+            "args": {key: str(value) if isinstance(value, Path) else value
+                     for key, value in args.items()},
+        }
+        with self._lock:
+            self.events.append(event)
+            self._thread_names.setdefault(tid, track)
+
+    def _track_id(self, track: str) -> int:
+        """Stable synthetic thread id for a named track.
+
+        A new track is registered under the same lock that picks its id, so
+        two tracks first seen at once never share an id.
+        """
+        with self._lock:
+            for tid, name in self._thread_names.items():
+                if name == track:
+                    return tid
+            tid = 1_000_000 + len(self._thread_names)
+            self._thread_names[tid] = track
+            return tid
+
+    def fork(self) -> "PipelineTracer":
+        """An empty tracer on this one's clock, for spans recorded elsewhere."""
+        child = PipelineTracer(enabled=self.enabled)
+        child._origin = self._origin
+        return child
+
+    def copy(self) -> "PipelineTracer":
+        """A tracer holding the spans recorded so far."""
+        snapshot = self.fork()
+        snapshot.merge(self)
+        return snapshot
+
+    def merge(self, other: "PipelineTracer") -> None:
+        """Add another tracer's spans, moving tracks whose id is taken here."""
+        with other._lock:
+            events = list(other.events)
+            thread_names = dict(other._thread_names)
+        for event in events:
+            track = thread_names.get(event["tid"], str(event["tid"]))
+            with self._lock:
+                tid = event["tid"] if self._thread_names.get(event["tid"], track) == track else None
+            if tid is None:
+                tid = self._track_id(track)
+            with self._lock:
+                self.events.append(dict(event, tid=tid))
+                self._thread_names.setdefault(tid, track)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Build the Chrome trace-event JSON object."""
+        with self._lock:
+            metadata = [
+                {"name": "process_name", "ph": "M", "pid": self._pid,
+                 "args": {"name": "ml-visualization pipeline"}}
+            ]
+            for tid, thread_name in self._thread_names.items():
+                metadata.append({"name": "thread_name", "ph": "M", "pid": self._pid,
+                                 "tid": tid, "args": {"name": thread_name}})
+            return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> Optional[Path]:
+        """Write the trace to a file, returning None when tracing is disabled."""
+        if not self.enabled:
+            return None
+
+        path = Path(path)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        return path
@@ -1,16 +1,29 @@
 """
 Visual Mapper: Maps abstract concepts to concrete visual elements and animations.
 """
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Sequence
 from dataclasses import dataclass
 from enum import Enum
-# Use basic Python instead of numpy for compatibility
 import random
 import math
-HAS_NUMPY = False
+try:
+    import numpy as np
+    from decomposition import PCAResult, compute_pca
+    HAS_NUMPY = True
+except ImportError:
+    # Fall back to one POINT element per data point and fixed PCA geometry
+    HAS_NUMPY = False
 from scene_planner import Scene, SceneElement
 
 
+# Bump when mapping changes, invalidating cached visual scenes
+MAPPER_VERSION = 1
+
+# Size of the synthetic sample shown when no dataset is given; generated
+# scenes rebuild the same sample with generate_correlated_points()
+SYNTHETIC_POINTS = 50
+
+
 class VisualElementType(Enum):
     POINT = "point"
     ARROW = "arrow"
@@ -20,10 +33,16 @@ class VisualElementType(Enum):
     AXES = "axes"
     ELLIPSE = "ellipse"
     TRANSFORMATION = "transformation"
+    POINT_CLOUD = "point_cloud"
 
 
 @dataclass
 class VisualElement:
+    """One visual object.
+    
+    POINT_CLOUD elements keep their points as NumPy arrays in ``properties``:
+    ``positions`` (N, 3), ``colors`` (N, 3) RGB in [0, 1] and ``sizes`` (N,).
+    """
     element_id: str
     element_type: VisualElementType
     position: Tuple[float, float, float]
@@ -64,6 +83,33 @@ class VisualMapper:
             "cast_shadow": {"type": "projection", "duration": 1.5},
             "rotate": {"type": "rotation", "angle": 360, "duration": 3.0}
         }
+        
+        # Points shown by every scene; arrows, ellipse and projection plane
+        # are derived from their PCA, or from dataset_pca when the points are
+        # a sample of a larger dataset
+        self.dataset = None
+        self.dataset_pca = None
+        # Explained variance ratio of every computed component, which for
+        # high-dimensional data is more than the three that are drawn
+        self.dataset_scree: Optional[List[float]] = None
+    
+    def set_dataset(self, 
+                    points: Optional["np.ndarray"], 
+                    pca: Optional["PCAResult"] = None, 
+                    scree: Optional[Sequence[float]] = None) -> None:
+        """Show the given (N, 3) points instead of the synthetic sample.
+        
+        ``pca`` describes the full dataset the points were sampled from, in
+        the same coordinates; None computes it from the points themselves.
+        ``scree`` lists the explained variance ratios of all its components.
+        """
+        self.dataset = points
+        self.dataset_pca = pca
+        self.dataset_scree = [float(r) for r in scree] if scree is not None else None
+    
+    def cache_inputs(self) -> Tuple[Any, ...]:
+        """Mapper state besides the scenes that the visual scenes depend on."""
+        return (self.dataset, self.dataset_pca, self.dataset_scree)
     
     def map_scenes_to_visuals(self, scenes: List[Scene]) -> List[Dict[str, Any]]:
         """Convert scenes to visual representations."""
@@ -87,7 +133,9 @@ class VisualMapper:
                 "elements": visual_elements,
                 "camera_movements": camera_movements,
                 "narration": scene.narration,
-                "background_color": self.color_palette["background"]
+                "background_color": self.color_palette["background"],
+                "point_lod": "auto",
+                "explained_variance_ratio": self._scree()
             }
             
             visual_scenes.append(visual_scene)
@@ -120,6 +168,9 @@ class VisualMapper:
     
     def _create_data_points(self, element: SceneElement) -> List[VisualElement]:
         """Create visual representation of data points."""
+        if HAS_NUMPY:
+            return [self._create_point_cloud(element)]
+        
         visuals = []
         
         # Generate sample data points
@@ -157,20 +208,80 @@ class VisualMapper:
         
         return visuals
     
+    def _get_dataset(self) -> "np.ndarray":
+        """The (N, 3) points shown in the scenes, generated on first use."""
+        if self.dataset is None:
+            self.dataset = generate_correlated_points(SYNTHETIC_POINTS)
+        return self.dataset
+    
+    def _scree(self) -> List[float]:
+        """Explained variance ratios of the scene dataset's components."""
+        if self.dataset_scree is not None:
+            return self.dataset_scree
+        if not HAS_NUMPY:
+            return []
+        return [float(r) for r in self._dataset_pca().explained_variance_ratio]
+    
+    def _dataset_pca(self) -> "PCAResult":
+        """PCA of the scene dataset; cached by fingerprint across scenes."""
+        if self.dataset_pca is not None:
+            return self.dataset_pca
+        data = self._get_dataset()
+        return compute_pca(data, n_components=min(3, data.shape[1]))
+    
+    def _create_point_cloud(self, element: SceneElement) -> VisualElement:
+        """Create the data points as one array-backed POINT_CLOUD element."""
+        positions = self._get_dataset()
+        n_points = len(positions)
+        
+        return VisualElement(
+            element_id=element.element_type,
+            element_type=VisualElementType.POINT_CLOUD,
+            position=(0, 0, 0),
+            properties={
+                "positions": positions,
+                "colors": np.tile(hex_to_rgb(self.color_palette["neutral"]), (n_points, 1)),
+                "sizes": np.full(n_points, 0.1),
+                "opacity": 0.8,
+                # Positions are the scene dataset, which generated code can load
+                "shared_dataset": True
+            },
+            animation_sequence=[
+                {
+                    "type": "fade_in",
+                    "delay": 0,
+                    "duration": 0.5,
+                    # Stagger the appearance, finishing within a few seconds for large clouds
+                    "stagger": min(0.05, 2.5 / n_points)
+                }
+            ],
+            dependencies=[]
+        )
+    
     def _create_principal_component(self, element: SceneElement) -> List[VisualElement]:
         """Create visual representation of principal components."""
         visuals = []
         
+        # Axes of the shown data, each two standard deviations long
+        origin = (0, 0, 0)
+        pc1_direction, pc1_length = (2, 1.5, 0.5), 3.0
+        pc2_direction, pc2_length = (-1, 1, 0.2), 2.0
+        if HAS_NUMPY:
+            pca = self._dataset_pca()
+            origin = tuple(float(v) for v in pca.mean)
+            pc1_direction, pc1_length = tuple(float(v) for v in pca.components[0]), pca.axis_length(0)
+            pc2_direction, pc2_length = tuple(float(v) for v in pca.components[1]), pca.axis_length(1)
+        
         # First principal component (largest variance direction)
         pc1 = VisualElement(
             element_id="pc1_arrow",
             element_type=VisualElementType.ARROW,
-            position=(0, 0, 0),
+            position=origin,
             properties={
                 "color": self.color_palette["primary"],
-                "direction": (2, 1.5, 0.5),  # Direction of max variance
+                "direction": pc1_direction,  # Direction of max variance
                 "thickness": 0.05,
-                "length": 3.0
+                "length": pc1_length
             },
             animation_sequence=[
                 {
@@ -187,12 +298,12 @@ class VisualMapper:
         pc2 = VisualElement(
             element_id="pc2_arrow",
             element_type=VisualElementType.ARROW,
-            position=(0, 0, 0),
+            position=origin,
             properties={
                 "color": self.color_palette["secondary"],
-                "direction": (-1, 1, 0.2),  # Orthogonal direction
+                "direction": pc2_direction,  # Orthogonal direction
                 "thickness": 0.04,
-                "length": 2.0
+                "length": pc2_length
             },
             animation_sequence=[
                 {
@@ -212,17 +323,30 @@ class VisualMapper:
         visuals = []
         
         # Variance ellipse
+        position = (0, 0, 0)
+        properties = {
+            "color": self.color_palette["accent"],
+            "opacity": 0.3,
+            "width": 4.0,
+            "height": 2.0,
+            "rotation": 30  # Aligned with data spread
+        }
+        if HAS_NUMPY:
+            # Two-sigma ellipse lying in the plane of the first two components
+            pca = self._dataset_pca()
+            position = tuple(float(v) for v in pca.mean)
+            properties.update({
+                "width": pca.axis_length(0) * 2,
+                "height": pca.axis_length(1) * 2,
+                "rotation": 0,
+                "orientation": pca.basis().tolist()
+            })
+        
         ellipse = VisualElement(
             element_id="variance_ellipse",
             element_type=VisualElementType.ELLIPSE,
-            position=(0, 0, 0),
-            properties={
-                "color": self.color_palette["accent"],
-                "opacity": 0.3,
-                "width": 4.0,
-                "height": 2.0,
-                "rotation": 30  # Aligned with data spread
-            },
+            position=position,
+            properties=properties,
             animation_sequence=[
                 {
                     "type": "fade_in",
@@ -239,6 +363,31 @@ class VisualMapper:
         )
         visuals.append(ellipse)
         
+        scree = self._scree()
+        if scree:
+            # Scree caption; wide datasets also show how much the drawn axes leave out
+            label = " · ".join(f"PC{i+1} {r:.1%}" for i, r in enumerate(scree[:3]))
+            if len(scree) > 3:
+                label += f" · rest {max(0.0, 1.0 - sum(scree[:3])):.1%}"
+            visuals.append(VisualElement(
+                element_id="variance_scree",
+                element_type=VisualElementType.TEXT,
+                position=(0, 3.2, 0),
+                properties={
+                    "text": label,
+                    "color": self.color_palette["text"],
+                    "size": 0.4
+                },
+                animation_sequence=[
+                    {
+                        "type": "fade_in",
+                        "delay": 1.0,
+                        "duration": 1.0
+                    }
+                ],
+                dependencies=["variance_ellipse"]
+            ))
+        
         return visuals
     
     def _create_projection(self, element: SceneElement) -> List[VisualElement]:
@@ -246,16 +395,29 @@ class VisualMapper:
         visuals = []
         
         # Projection plane
+        position = (0, 0, -1)
+        properties = {
+            "color": self.color_palette["warning"],
+            "opacity": 0.2,
+            "width": 6,
+            "height": 4
+        }
+        if HAS_NUMPY:
+            # The plane spanned by PC1 and PC2 through the data mean, sized to
+            # cover two standard deviations either side
+            pca = self._dataset_pca()
+            position = tuple(float(v) for v in pca.mean)
+            properties.update({
+                "width": pca.axis_length(0) * 2,
+                "height": pca.axis_length(1) * 2,
+                "orientation": pca.basis().tolist()
+            })
+        
         plane = VisualElement(
             element_id="projection_plane",
             element_type=VisualElementType.SURFACE,
-            position=(0, 0, -1),
-            properties={
-                "color": self.color_palette["warning"],
-                "opacity": 0.2,
-                "width": 6,
-                "height": 4
-            },
+            position=position,
+            properties=properties,
             animation_sequence=[
                 {
                     "type": "fade_in",
@@ -408,6 +570,24 @@ class VisualMapper:
         return movements
 
 
+def generate_correlated_points(n_points: int, seed: int = 42) -> "np.ndarray":
+    """Vectorized version of the correlated 3D sample used for data points."""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((n_points, 3)) * [1.4, 0.8, 0.6]
+    
+    positions = np.empty((n_points, 3))
+    positions[:, 0] = noise[:, 0]
+    positions[:, 1] = positions[:, 0] * 0.7 + noise[:, 1]
+    positions[:, 2] = positions[:, 0] * 0.3 + positions[:, 1] * 0.2 + noise[:, 2]
+    return positions
+
+
+def hex_to_rgb(hex_color: str) -> Tuple[float, float, float]:
+    """Convert "#rrggbb" to RGB components in [0, 1]."""
+    value = hex_color.lstrip("#")
+    return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
 def map_scenes_to_visuals(scenes: List[Scene]) -> List[Dict[str, Any]]:
     """Convenience function to map scenes to visual representations."""
     mapper = VisualMapper()